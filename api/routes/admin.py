@@ -8,7 +8,7 @@ Handles admin-only operations:
 """
 
 from fastapi import APIRouter, Depends, HTTPException, status, Query, Request
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, selectinload, contains_eager
 from sqlalchemy import or_, and_, text
 from typing import Optional, List, Dict, Any
 from datetime import datetime, timedelta
@@ -180,8 +180,12 @@ async def list_users(
     # Get total count
     total = query.count()
     
-    # Apply pagination
-    users = query.order_by(User.created_at.desc()).offset(skip).limit(limit).all()
+    # Apply pagination (eager-load the collections read below: one query each, not one per user)
+    users = query.options(
+        selectinload(User.subscriptions),
+        selectinload(User.keyword_searches),
+        selectinload(User.opportunities)
+    ).order_by(User.created_at.desc()).offset(skip).limit(limit).all()
     
     # Build response
     result = []
@@ -849,8 +853,10 @@ async def list_subscriptions(
     # Get total count
     total = query.count()
     
-    # Apply pagination
-    subscriptions = query.order_by(Subscription.created_at.desc()).offset(skip).limit(limit).all()
+    # Apply pagination (populate sub.user from the existing join instead of lazy-loading it)
+    subscriptions = query.options(
+        contains_eager(Subscription.user)
+    ).order_by(Subscription.created_at.desc()).offset(skip).limit(limit).all()
     
     # Build response
     result = []
@@ -984,8 +990,11 @@ async def list_support_threads(
     # Get total count
     total = query.count()
     
-    # Apply pagination
-    threads = query.order_by(SupportThread.updated_at.desc()).offset(skip).limit(limit).all()
+    # Apply pagination (user from the existing join, messages in one extra query)
+    threads = query.options(
+        contains_eager(SupportThread.user),
+        selectinload(SupportThread.messages)
+    ).order_by(SupportThread.updated_at.desc()).offset(skip).limit(limit).all()
     
     # Build response
     result = []
@@ -1081,6 +1090,7 @@ async def reply_to_thread(
     # Add admin/support reply
     message = SupportMessage(
         thread_id=thread.id,
+        user_id=thread.user_id,
         content=sanitized_content,
         sender=MessageSender.SUPPORT,
         read=True
@@ -213,18 +213,15 @@ async def create_keyword_search(
         search_data.scraping_interval = None
     
     # Check concurrent keyword search limit (active + soft-deleted this month)
-    concurrent_allowed, concurrent_count, concurrent_limit = SubscriptionService.check_usage_limit(
+    # and monthly creation limit
+    usage_limits = SubscriptionService.check_usage_limits(
         user_id=current_user.id,
-        metric_type="keyword_searches",
-        db=db
-    )
-    
-    # Check monthly creation limit
-    monthly_allowed, monthly_count, monthly_limit = SubscriptionService.check_usage_limit(
-        user_id=current_user.id,
-        metric_type="keyword_searches_created_per_month",
-        db=db
+        metric_types=["keyword_searches", "keyword_searches_created_per_month"],
+        db=db,
+        subscription=subscription
     )
+    concurrent_allowed, concurrent_count, concurrent_limit = usage_limits["keyword_searches"]
+    monthly_allowed, monthly_count, monthly_limit = usage_limits["keyword_searches_created_per_month"]
     
     if not concurrent_allowed:
         raise HTTPException(
@@ -256,18 +253,20 @@ async def create_keyword_search(
     )
     
     db.add(keyword_search)
-    db.commit()
-    db.refresh(keyword_search)
     
-    # Track monthly creation count
+    # Track monthly creation count (committed together with the search)
     UsageService.increment_usage(
         user_id=current_user.id,
         subscription_id=subscription.id,
         metric_type="keyword_searches_created_per_month",
         amount=1,
-        db=db
+        db=db,
+        autocommit=False
     )
     
+    db.commit()
+    db.refresh(keyword_search)
+    
     # Create search in Rixly immediately (for reuse later)
     # This allows us to store rixly_search_id right away (stored in zola_search_id column for DB compatibility)
     try:
@@ -655,7 +654,8 @@ async def update_keyword_search(
             allowed, current, limit = SubscriptionService.check_usage_limit(
                 user_id=current_user.id,
                 metric_type="keyword_searches",
-                db=db
+                db=db,
+                subscription=subscription
             )
             if not allowed:
                 raise HTTPException(
@@ -664,7 +664,8 @@ async def generate_opportunities(
     allowed, current, limit_count = SubscriptionService.check_usage_limit(
         user_id=current_user.id,
         metric_type="opportunities_per_month",
-        db=db
+        db=db,
+        subscription=subscription
     )
     
     if not allowed:
@@ -145,6 +145,8 @@ async def create_price(
             paddle_product_id=price_data.paddle_product_id,
             db=db
         )
+        # Commit before responding so a 201 means the price is stored
+        db.commit()
         
         return price.to_dict()
     except ValueError as e:
@@ -303,11 +303,11 @@ async def get_subscription_limits(
         # Auto-create free subscription for new users (3-month free tier)
         subscription = SubscriptionService.create_free_subscription(current_user.id, db)
     
-    limits = SubscriptionService.get_plan_limits(subscription.plan.value)
+    limits = SubscriptionService.get_plan_limits(subscription.plan)
     
     return {
         "plan": subscription.plan.value,
-        "limits": limits
+        "limits": dict(limits)
     }
 
 
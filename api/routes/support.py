@@ -4,7 +4,7 @@ Support Routes
 Handles support thread and message operations.
 """
 
-from fastapi import APIRouter, Depends, HTTPException, status, Request
+from fastapi import APIRouter, Depends, HTTPException, status, Request, BackgroundTasks
 from pydantic import BaseModel
 from sqlalchemy.orm import Session
 
@@ -135,6 +135,7 @@ async def get_support_thread(
 async def create_support_thread(
     request: Request,
     thread_data: CreateThreadRequest,
+    background_tasks: BackgroundTasks,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
@@ -170,7 +171,8 @@ async def create_support_thread(
         current_user.id,
         thread_data.subject.strip(),
         thread_data.message.strip(),
-        db
+        db,
+        background_tasks=background_tasks
     )
     
     # Create audit log entry for support thread creation
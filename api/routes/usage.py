@@ -98,11 +98,11 @@ async def get_usage_limits(
             detail="No active subscription found"
         )
     
-    limits = SubscriptionService.get_plan_limits(subscription.plan.value)
+    limits = SubscriptionService.get_plan_limits(subscription.plan)
     
     return {
         "plan": subscription.plan.value,
-        "limits": limits
+        "limits": dict(limits)
     }
 
 
@@ -143,7 +143,8 @@ async def check_usage_limit(
     allowed, current, limit = SubscriptionService.check_usage_limit(
         user_id=current_user.id,
         metric_type=metric_type,
-        db=db
+        db=db,
+        subscription=subscription
     )
     
     return {
@@ -5,6 +5,8 @@ SQLAlchemy database setup and session management.
 """
 
 from sqlalchemy import create_engine
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker, Session
 from typing import Generator
@@ -13,11 +15,23 @@ from core.config import get_settings
 
 settings = get_settings()
 
+# Connection pool settings (SQLite uses its own pool classes, which don't take these)
+pool_options = {} if "sqlite" in settings.DATABASE_URL else {
+    "pool_size": settings.DB_POOL_SIZE,
+    "max_overflow": settings.DB_MAX_OVERFLOW,
+    "pool_timeout": settings.DB_POOL_TIMEOUT,
+    "pool_recycle": settings.DB_POOL_RECYCLE,
+    "pool_pre_ping": settings.DB_POOL_PRE_PING,
+    "pool_use_lifo": settings.DB_POOL_USE_LIFO,
+}
+
 # Create database engine
 engine = create_engine(
     settings.DATABASE_URL,
     connect_args={"check_same_thread": False} if "sqlite" in settings.DATABASE_URL else {},
-    echo=settings.DEBUG
+    echo=settings.DEBUG,
+    query_cache_size=settings.DB_QUERY_CACHE_SIZE,
+    **pool_options
 )
 
 # Create session factory
@@ -48,6 +62,24 @@ def get_db() -> Generator[Session, None, None]:
         db.close()
 
 
+def upsert_insert(db: Session):
+    """
+    Get the dialect-specific INSERT construct that supports ON CONFLICT.
+    
+    PostgreSQL in production, SQLite in tests; both expose the same
+    on_conflict_do_update() / on_conflict_do_nothing() API.
+    
+    Args:
+        db: Database session
+        
+    Returns:
+        The dialect's insert() function
+    """
+    if db.get_bind().dialect.name == "sqlite":
+        return sqlite_insert
+    return pg_insert
+
+
 def init_db():
     """
     Initialize database by creating all tables.
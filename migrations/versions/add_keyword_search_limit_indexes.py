@@ -0,0 +1,44 @@
+"""Add partial indexes for the concurrent keyword search limit
+
+Revision ID: add_keyword_search_limit_indexes
+Revises: add_subscription_job_indexes
+Create Date: 2026-10-16 15:00:00.000000
+
+This migration adds two partial indexes on keyword_searches backing the
+concurrent search limit check: one over each user's active searches and one
+over each user's soft-deleted searches by deletion time.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'add_keyword_search_limit_indexes'
+down_revision = 'add_subscription_job_indexes'  # Points to the current head
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    """
+    Create partial indexes for the keyword search limit counts.
+    """
+    op.create_index(
+        'ix_keyword_searches_user_active',
+        'keyword_searches',
+        ['user_id'],
+        postgresql_where=sa.text('enabled AND deleted_at IS NULL')
+    )
+    op.create_index(
+        'ix_keyword_searches_user_deleted_at',
+        'keyword_searches',
+        ['user_id', 'deleted_at'],
+        postgresql_where=sa.text('deleted_at IS NOT NULL')
+    )
+
+
+def downgrade() -> None:
+    """
+    Drop partial indexes for the keyword search limit counts.
+    """
+    op.drop_index('ix_keyword_searches_user_deleted_at', table_name='keyword_searches')
+    op.drop_index('ix_keyword_searches_user_active', table_name='keyword_searches')
@@ -0,0 +1,38 @@
+"""Add partial index for active price lookups by plan and billing period
+
+Revision ID: add_price_active_plan_period_idx
+Revises: add_e2e_test_results
+Create Date: 2026-10-16 12:00:00.000000
+
+This migration adds a partial index on prices (plan, billing_period) covering
+only active rows. It backs PriceService.get_price_by_plan_and_period and the
+deactivate-other-prices UPDATE in create_or_update_price.
+The Paddle price ID is already unique (uq_price_paddle_id).
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'add_price_active_plan_period_idx'
+down_revision = 'add_e2e_test_results'  # Points to the current head
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    """
+    Create partial index on active prices.
+    """
+    op.create_index(
+        'ix_prices_active_plan_period',
+        'prices',
+        ['plan', 'billing_period'],
+        postgresql_where=sa.text('is_active')
+    )
+
+
+def downgrade() -> None:
+    """
+    Drop partial index on active prices.
+    """
+    op.drop_index('ix_prices_active_plan_period', table_name='prices')
@@ -0,0 +1,45 @@
+"""Add covering columns to the active price partial index
+
+Revision ID: add_price_active_idx_include
+Revises: add_price_active_plan_period_idx
+Create Date: 2026-10-16 13:00:00.000000
+
+This migration recreates ix_prices_active_plan_period with
+INCLUDE (id, paddle_price_id, amount, currency), so active price lookups
+by plan/billing_period can be answered with an index-only scan.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'add_price_active_idx_include'
+down_revision = 'add_price_active_plan_period_idx'  # Points to the current head
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    """
+    Recreate the active price partial index with covering columns.
+    """
+    op.drop_index('ix_prices_active_plan_period', table_name='prices')
+    op.create_index(
+        'ix_prices_active_plan_period',
+        'prices',
+        ['plan', 'billing_period'],
+        postgresql_where=sa.text('is_active'),
+        postgresql_include=['id', 'paddle_price_id', 'amount', 'currency']
+    )
+
+
+def downgrade() -> None:
+    """
+    Recreate the active price partial index without covering columns.
+    """
+    op.drop_index('ix_prices_active_plan_period', table_name='prices')
+    op.create_index(
+        'ix_prices_active_plan_period',
+        'prices',
+        ['plan', 'billing_period'],
+        postgresql_where=sa.text('is_active')
+    )
@@ -0,0 +1,55 @@
+"""Add composite indexes for subscription management job queries
+
+Revision ID: add_subscription_job_indexes
+Revises: add_price_active_idx_include
+Create Date: 2026-10-16 14:00:00.000000
+
+This migration adds composite indexes for the predicates scanned by the
+subscription management jobs (Paddle sync, expired subscriptions, upcoming
+renewals) and for per-subscription usage metric lookups.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'add_subscription_job_indexes'
+down_revision = 'add_price_active_idx_include'  # Points to the current head
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    """
+    Create composite indexes for subscription management jobs.
+    """
+    op.create_index(
+        'ix_subscriptions_status_paddle',
+        'subscriptions',
+        ['status', 'id'],
+        postgresql_where=sa.text('paddle_subscription_id IS NOT NULL')
+    )
+    op.create_index(
+        'ix_subscriptions_status_period_end',
+        'subscriptions',
+        ['status', 'current_period_end']
+    )
+    op.create_index(
+        'ix_subscriptions_status_next_billing',
+        'subscriptions',
+        ['status', 'next_billing_date']
+    )
+    op.create_index(
+        'ix_usage_metrics_subscription_type_period',
+        'usage_metrics',
+        ['subscription_id', 'metric_type', 'period_start']
+    )
+
+
+def downgrade() -> None:
+    """
+    Drop composite indexes for subscription management jobs.
+    """
+    op.drop_index('ix_usage_metrics_subscription_type_period', table_name='usage_metrics')
+    op.drop_index('ix_subscriptions_status_next_billing', table_name='subscriptions')
+    op.drop_index('ix_subscriptions_status_period_end', table_name='subscriptions')
+    op.drop_index('ix_subscriptions_status_paddle', table_name='subscriptions')
@@ -0,0 +1,59 @@
+"""Add user_id to support_messages for unread notification counts
+
+Revision ID: add_support_message_user_id
+Revises: add_keyword_search_limit_indexes
+Create Date: 2026-10-16 16:00:00.000000
+
+This migration denormalizes the thread owner onto support_messages, backfills
+it from support_threads, and adds a partial index over unread support replies
+so the notification count no longer joins support_threads.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'add_support_message_user_id'
+down_revision = 'add_keyword_search_limit_indexes'  # Points to the current head
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    """
+    Add and backfill support_messages.user_id, then index unread replies.
+    """
+    op.add_column('support_messages', sa.Column('user_id', sa.String(), nullable=True))
+    
+    op.execute("""
+        UPDATE support_messages
+        SET user_id = (
+            SELECT support_threads.user_id
+            FROM support_threads
+            WHERE support_threads.id = support_messages.thread_id
+        )
+    """)
+    
+    op.alter_column('support_messages', 'user_id', nullable=False)
+    op.create_foreign_key(
+        'fk_support_messages_user_id',
+        'support_messages',
+        'users',
+        ['user_id'],
+        ['id'],
+        ondelete='CASCADE'
+    )
+    op.create_index(
+        'ix_support_messages_user_unread',
+        'support_messages',
+        ['user_id'],
+        postgresql_where=sa.text("sender = 'SUPPORT' AND NOT read")
+    )
+
+
+def downgrade() -> None:
+    """
+    Drop support_messages.user_id and its index.
+    """
+    op.drop_index('ix_support_messages_user_unread', table_name='support_messages')
+    op.drop_constraint('fk_support_messages_user_id', 'support_messages', type_='foreignkey')
+    op.drop_column('support_messages', 'user_id')
@@ -4,7 +4,7 @@ Keyword Search Model
 Represents a user's keyword search configuration (freelancer-focused).
 """
 
-from sqlalchemy import Column, String, Text, Boolean, ForeignKey, JSON, Index, DateTime
+from sqlalchemy import Column, String, Text, Boolean, ForeignKey, JSON, Index, DateTime, text
 from sqlalchemy.orm import relationship
 
 from core.database import Base
@@ -45,6 +45,20 @@ class KeywordSearch(Base, TimestampMixin, SoftDeleteMixin):
         Index('ix_keyword_searches_user_enabled', 'user_id', 'enabled'),
         # Index for soft delete queries
         Index('ix_keyword_searches_deleted_at', 'deleted_at'),
+        # Concurrent search limit (SubscriptionService.check_usage_limits):
+        # active searches per user
+        Index(
+            'ix_keyword_searches_user_active',
+            'user_id',
+            postgresql_where=text('enabled AND deleted_at IS NULL')
+        ),
+        # soft-deleted searches per user, by deletion time
+        Index(
+            'ix_keyword_searches_user_deleted_at',
+            'user_id',
+            'deleted_at',
+            postgresql_where=text('deleted_at IS NOT NULL')
+        ),
     )
     
     # Primary Key
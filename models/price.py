@@ -5,7 +5,7 @@ Represents a Paddle price for a subscription plan.
 Prices are stored in the database for dynamic management.
 """
 
-from sqlalchemy import Column, String, Integer, Boolean, ForeignKey, Enum as SQLEnum, CheckConstraint, UniqueConstraint, Index
+from sqlalchemy import Column, String, Integer, Boolean, ForeignKey, Enum as SQLEnum, CheckConstraint, UniqueConstraint, Index, text
 from sqlalchemy.orm import relationship
 from datetime import datetime
 import enum
@@ -50,10 +50,18 @@ class Price(Base, TimestampMixin):
         UniqueConstraint('paddle_price_id', name='uq_price_paddle_id'),
         # Ensure amount is positive
         CheckConstraint('amount > 0', name='check_price_amount_positive'),
-        # Partial unique index: only one active price per plan/billing_period
-        # This is enforced at the application level, but we can add a partial unique index
-        # Note: SQLAlchemy doesn't support partial unique indexes directly in __table_args__
-        # We'll handle this in the PriceService.create_or_update_price method
+        # Only one active price per plan/billing_period is enforced at the application
+        # level in PriceService.create_or_update_price
+        # Partial covering index for active price lookups by plan/billing_period
+        # (active rows only; INCLUDE lets checkout lookups skip the heap on PostgreSQL)
+        Index(
+            'ix_prices_active_plan_period',
+            'plan',
+            'billing_period',
+            postgresql_where=text('is_active'),
+            postgresql_include=['id', 'paddle_price_id', 'amount', 'currency'],
+            sqlite_where=text('is_active')
+        ),
     )
     
     # Primary Key
@@ -61,7 +69,13 @@ class Price(Base, TimestampMixin):
     
     # Price Details
     plan = Column(String(50), nullable=False, index=True)  # starter, professional, power
-    billing_period = Column(SQLEnum(BillingPeriod), nullable=False, index=True)
+    # Named explicitly to match the billingperiod type created by migrations;
+    # members are bound by name, so no per-query string conversion is needed
+    billing_period = Column(
+        SQLEnum(BillingPeriod, name="billingperiod", native_enum=True, validate_strings=True),
+        nullable=False,
+        index=True
+    )
     
     # Paddle Integration
     paddle_price_id = Column(String(255), nullable=False, unique=True, index=True)
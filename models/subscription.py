@@ -4,7 +4,7 @@ Subscription Model
 Represents a user's subscription to a pricing plan.
 """
 
-from sqlalchemy import Column, String, DateTime, ForeignKey, Enum as SQLEnum, Boolean, Index
+from sqlalchemy import Column, String, DateTime, ForeignKey, Enum as SQLEnum, Boolean, Index, text
 from sqlalchemy.orm import relationship
 from datetime import datetime
 import enum
@@ -61,6 +61,18 @@ class Subscription(Base, TimestampMixin):
     __table_args__ = (
         # Composite index for common query: user_id + status
         Index('ix_subscriptions_user_status', 'user_id', 'status'),
+        # Indexes for the subscription management jobs (see SubscriptionManagementService)
+        # Paddle sync: status scan of Paddle-backed subscriptions, paged by id
+        Index(
+            'ix_subscriptions_status_paddle',
+            'status',
+            'id',
+            postgresql_where=text('paddle_subscription_id IS NOT NULL')
+        ),
+        # Expired subscriptions: status + period end
+        Index('ix_subscriptions_status_period_end', 'status', 'current_period_end'),
+        # Upcoming renewals: status + next billing date
+        Index('ix_subscriptions_status_next_billing', 'status', 'next_billing_date'),
     )
     
     # Foreign Keys
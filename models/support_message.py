@@ -4,7 +4,7 @@ Support Message Model
 Represents a message within a support thread.
 """
 
-from sqlalchemy import Column, String, ForeignKey, Boolean, Enum as SQLEnum
+from sqlalchemy import Column, String, ForeignKey, Boolean, Enum as SQLEnum, Index, text
 from sqlalchemy.orm import relationship
 import enum
 
@@ -26,8 +26,19 @@ class SupportMessage(Base, TimestampMixin):
     """
     __tablename__ = "support_messages"
     
+    __table_args__ = (
+        # Unread support replies per user (notification bell count)
+        Index(
+            'ix_support_messages_user_unread',
+            'user_id',
+            postgresql_where=text("sender = 'SUPPORT' AND NOT read")
+        ),
+    )
+    
     id = Column(String, primary_key=True, default=generate_uuid)
     thread_id = Column(String, ForeignKey("support_threads.id", ondelete="CASCADE"), nullable=False, index=True)
+    # Denormalized from the thread so unread counts don't need a join
+    user_id = Column(String, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
     content = Column(String, nullable=False)
     sender = Column(SQLEnum(MessageSender), nullable=False, index=True)
     read = Column(Boolean, default=False, nullable=False, index=True)
@@ -11,6 +11,15 @@ from core.database import Base
 from models.base import generate_uuid, TimestampMixin
 
 
+# Metric types tracked per calendar month (keyword_searches is a concurrent
+# limit counted from keyword_searches, not a usage metric row)
+MONTHLY_METRIC_TYPES = (
+    "opportunities_per_month",
+    "api_calls_per_month",
+    "keyword_searches_created_per_month",
+)
+
+
 class UsageMetric(Base, TimestampMixin):
     """
     Usage metric model for tracking user usage.
@@ -43,6 +52,8 @@ class UsageMetric(Base, TimestampMixin):
         UniqueConstraint('user_id', 'metric_type', 'period_start', name='uq_usage_metric_user_type_period'),
         # Composite index for common queries
         Index('ix_usage_metrics_user_type_period', 'user_id', 'metric_type', 'period_start'),
+        # Per-subscription lookups and cleanup in the usage metric jobs
+        Index('ix_usage_metrics_subscription_type_period', 'subscription_id', 'metric_type', 'period_start'),
         # Ensure count is non-negative
         CheckConstraint('count >= 0', name='check_usage_count_positive'),
     )
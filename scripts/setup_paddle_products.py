@@ -324,30 +324,24 @@ def main():
         print("\n💾 Saving prices to database...")
         db = SessionLocal()
         try:
+            items = []
             for plan_key, ids in price_ids.items():
-                # Save monthly price
-                if ids.get('monthly_price_id'):
-                    PriceService.create_or_update_price(
-                        plan=plan_key,
-                        billing_period="monthly",
-                        paddle_price_id=ids['monthly_price_id'],
-                        amount=setup.get_plan_amount(plan_key, "monthly"),
-                        paddle_product_id=ids.get('product_id'),
-                        db=db
-                    )
-                    print(f"   ✅ Saved {plan_key} monthly price to database")
-                
-                # Save yearly price
-                if ids.get('yearly_price_id'):
-                    PriceService.create_or_update_price(
-                        plan=plan_key,
-                        billing_period="yearly",
-                        paddle_price_id=ids['yearly_price_id'],
-                        amount=setup.get_plan_amount(plan_key, "yearly"),
-                        paddle_product_id=ids.get('product_id'),
-                        db=db
-                    )
-                    print(f"   ✅ Saved {plan_key} yearly price to database")
+                for billing_period in ("monthly", "yearly"):
+                    paddle_price_id = ids.get(f"{billing_period}_price_id")
+                    if paddle_price_id:
+                        items.append({
+                            "plan": plan_key,
+                            "billing_period": billing_period,
+                            "paddle_price_id": paddle_price_id,
+                            "amount": setup.get_plan_amount(plan_key, billing_period),
+                            "paddle_product_id": ids.get('product_id'),
+                        })
+            
+            # Save all prices in one batch (single transaction)
+            prices = PriceService.create_or_update_prices(items, db)
+            db.commit()
+            for price in prices:
+                print(f"   ✅ Saved {price.plan} {price.billing_period.value} price to database")
         finally:
             db.close()
         
@@ -64,9 +64,6 @@ class AuthService:
         Raises:
             HTTPException: If email already exists
         """
-        from fastapi import HTTPException, status
-        from datetime import datetime
-        
         # Check if user already exists
         existing_user = db.query(User).filter(User.email == email).first()
         if existing_user:
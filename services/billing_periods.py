@@ -0,0 +1,36 @@
+"""
+Billing Periods
+
+Calendar-month boundaries shared by the usage and subscription services.
+"""
+
+import calendar
+from datetime import datetime
+from functools import lru_cache
+from typing import Optional, Tuple
+
+
+@lru_cache(maxsize=2)
+def _month_bounds(year: int, month: int) -> Tuple[datetime, datetime]:
+    """Build the (start, end) datetimes for one calendar month."""
+    last_day = calendar.monthrange(year, month)[1]
+    return datetime(year, month, 1), datetime(year, month, last_day, 23, 59, 59)
+
+
+def current_month_bounds(now: Optional[datetime] = None) -> Tuple[datetime, datetime]:
+    """
+    Get the current calendar month as a usage period.
+
+    The boundaries are cached per month, so repeated calls on the usage
+    hot path only read the clock.
+
+    Args:
+        now: Reference time (default: datetime.utcnow())
+
+    Returns:
+        tuple: (period_start, period_end) - first instant of the month and
+            the last second of the month
+    """
+    if now is None:
+        now = datetime.utcnow()
+    return _month_bounds(now.year, now.month)
@@ -1060,12 +1060,8 @@ class OpportunityService:
                 opportunities_skipped += 1
                 continue
         
-        # Commit all opportunities
-        db.commit()
-        
         # Update keyword search last_run_at
         keyword_search.last_run_at = datetime.utcnow()
-        db.commit()
         
         # Step 6: Increment monthly usage
         if opportunities_created:
@@ -1074,9 +1070,13 @@ class OpportunityService:
                 subscription_id=subscription_id,
                 metric_type="opportunities_per_month",
                 amount=len(opportunities_created),
-                db=db
+                db=db,
+                autocommit=False
             )
         
+        # Commit opportunities, last_run_at and usage in one transaction
+        db.commit()
+        
         if progress_callback:
             progress_callback(95, f"Finalizing {len(opportunities_created)} opportunities...")
         
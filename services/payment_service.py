@@ -9,9 +9,11 @@ Handles Paddle payment integration business logic using the official Paddle Pyth
 """
 
 from typing import Optional, Dict, Any
-from datetime import datetime
+from datetime import datetime, timedelta
 from sqlalchemy.orm import Session
 from fastapi import HTTPException, status, Request
+import requests
+from requests.adapters import HTTPAdapter
 from paddle_billing import Client, Environment, Options
 from paddle_billing.Resources.Transactions.Operations import CreateTransaction, UpdateTransaction
 from paddle_billing.Resources.Subscriptions.Operations import UpdateSubscription
@@ -33,21 +35,64 @@ settings = get_settings()
 logger = get_logger(__name__)
 
 
+def _size_paddle_connection_pool(client: Client) -> None:
+    """
+    Size the Paddle SDK's keep-alive connection pool for concurrent requests.
+    
+    The SDK sends every request through one requests.Session, whose default
+    adapter keeps at most 10 connections per host. The subscription sync uses
+    up to PADDLE_SYNC_WORKERS threads; connections beyond the pool size are
+    discarded after each request and the next one pays a new TLS handshake.
+    The SDK's retry policy is carried over to the new adapter.
+    
+    Args:
+        client: Paddle SDK client
+    """
+    session = getattr(client, "client", None)
+    if not isinstance(session, requests.Session):
+        logger.debug("Paddle SDK HTTP session not found; keeping its default connection pool")
+        return
+    
+    pool_size = max(10, settings.PADDLE_SYNC_WORKERS)
+    current_adapter = session.get_adapter("https://")
+    session.mount("https://", HTTPAdapter(
+        pool_connections=pool_size,
+        pool_maxsize=pool_size,
+        max_retries=current_adapter.max_retries
+    ))
+
+
 class PaymentService:
     """Service for handling payment operations with Paddle using the official SDK."""
     
     # Initialize Paddle SDK client (singleton pattern)
     _paddle_client: Optional[Client] = None
     
+    # Whether Paddle is enabled, computed once from settings (see reset_enabled_cache)
+    _paddle_enabled: Optional[bool] = None
+    
     @classmethod
     def is_paddle_enabled(cls) -> bool:
         """
         Check if Paddle payment gateway is enabled.
         
+        Settings don't change at runtime, so the result is computed once.
+        
         Returns:
             bool: True if Paddle is enabled, False otherwise
         """
-        return settings.PADDLE_ENABLED and bool(settings.PADDLE_API_KEY)
+        if cls._paddle_enabled is None:
+            cls._paddle_enabled = settings.PADDLE_ENABLED and bool(settings.PADDLE_API_KEY)
+        return cls._paddle_enabled
+    
+    @classmethod
+    def reset_enabled_cache(cls) -> None:
+        """
+        Forget the cached is_paddle_enabled() result.
+        
+        For tests that change PADDLE_ENABLED or PADDLE_API_KEY on the settings.
+        """
+        cls._paddle_enabled = None
     
     @classmethod
     def get_paddle_client(cls) -> Client:
@@ -84,6 +129,8 @@ class PaymentService:
                 options = Options(environment=Environment.PRODUCTION)
                 cls._paddle_client = Client(settings.PADDLE_API_KEY, options=options)
                 logger.info("Paddle client initialized with PRODUCTION environment")
+            
+            _size_paddle_connection_pool(cls._paddle_client)
         
         return cls._paddle_client
     
@@ -557,7 +604,6 @@ class PaymentService:
             
             # Check if this is a renewal (new billing period started)
             # Get period dates from transaction or calculate
-            from datetime import timedelta
             new_period_start = None
             if data.get("billing_period") and hasattr(data.get("billing_period"), 'starts_at'):
                 new_period_start = data.get("billing_period").starts_at
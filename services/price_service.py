@@ -4,14 +4,297 @@ Price Service
 Handles price management and retrieval from database.
 """
 
-from typing import Optional, Dict, Any
-from sqlalchemy.orm import Session
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime
+from functools import lru_cache
+from typing import Optional, Dict, Any, NamedTuple
+from sqlalchemy import select, update, bindparam, tuple_, event
+from sqlalchemy.orm import Session, object_session
 from fastapi import HTTPException, status
 
+from core.database import upsert_insert
 from models.price import Price, BillingPeriod
 from models.subscription import SubscriptionPlan
 
 
+class PriceDTO(NamedTuple):
+    """
+    Read-only price row returned by PriceService lookups.
+    
+    Plain tuple selected column-by-column (no ORM identity map or attribute
+    instrumentation), so it can be cached and shared across sessions.
+    Mirrors the Price attributes and to_dict() used by callers.
+    """
+    id: str
+    plan: str
+    billing_period: BillingPeriod
+    paddle_price_id: str
+    paddle_product_id: Optional[str]
+    amount: int
+    currency: str
+    is_active: bool
+    created_at: datetime
+    updated_at: datetime
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert price to dictionary (same shape as Price.to_dict)."""
+        return {
+            "id": self.id,
+            "plan": self.plan,
+            "billing_period": self.billing_period.value if self.billing_period else None,
+            "paddle_price_id": self.paddle_price_id,
+            "paddle_product_id": self.paddle_product_id,
+            "amount": self.amount,
+            "currency": self.currency,
+            "is_active": self.is_active,
+            "created_at": self.created_at.isoformat() if self.created_at else None,
+            "updated_at": self.updated_at.isoformat() if self.updated_at else None,
+        }
+    
+    def get_formatted_amount(self) -> str:
+        """Get formatted price amount (e.g., $19.00)."""
+        return f"${self.amount / 100:.2f}"
+
+
+# Columns selected for PriceDTO, in field order
+_PRICE_COLUMNS = (
+    Price.id,
+    Price.plan,
+    Price.billing_period,
+    Price.paddle_price_id,
+    Price.paddle_product_id,
+    Price.amount,
+    Price.currency,
+    Price.is_active,
+    Price.created_at,
+    Price.updated_at,
+)
+
+
+# Process-wide in-memory snapshot of the active price catalog.
+# The prices table is tiny (plans x billing periods) and only changes when
+# Paddle prices are synced (create_or_update_price), so the whole active set
+# is loaded with one query and lookups become dict hits. Writes made through
+# PriceService mark the snapshot stale once their transaction ends, so the
+# next read rebuilds it;
+# PRICE_CACHE_TTL_SECONDS bounds staleness for writes made by other processes.
+# The dicts are never mutated in place, only swapped, so readers need no lock.
+# Database reads happen outside the lock, so anything installed from them is
+# tagged with the generation the read started in; invalidate_cache() bumps it,
+# and results from a read that overlapped an invalidation are discarded.
+PRICE_CACHE_TTL_SECONDS = 60
+_snapshot_lock = threading.Lock()
+_snapshot_generation = 0
+_snapshot_loaded_at: Optional[float] = None
+_active_prices: Dict[tuple[str, BillingPeriod], PriceDTO] = {}
+_active_prices_by_paddle_id: Dict[str, PriceDTO] = {}
+
+# Paddle price IDs recently looked up and not found, mapped to when the miss
+# was recorded. Paddle retries webhooks for prices we haven't synced yet;
+# remembering the miss briefly keeps each retry from hitting the database.
+# Cleared whenever the snapshot is invalidated (i.e. after price writes).
+PRICE_NEGATIVE_CACHE_TTL_SECONDS = 5
+PRICE_NEGATIVE_CACHE_MAX_SIZE = 1024
+_missing_paddle_ids: Dict[str, float] = {}
+
+# Statements are built once at import time so SQLAlchemy's compiled-statement
+# cache is hit on every call instead of rebuilding the query each time.
+_STMT_ACTIVE_BY_PLAN_AND_PERIOD = select(*_PRICE_COLUMNS).where(
+    Price.plan == bindparam("match_plan"),
+    Price.billing_period == bindparam("match_billing_period"),
+    Price.is_active.is_(True)
+).limit(1)
+
+_STMT_ACTIVE_BY_PADDLE_ID = select(*_PRICE_COLUMNS).where(
+    Price.paddle_price_id == bindparam("match_paddle_price_id"),
+    Price.is_active.is_(True)
+).limit(1)
+
+_STMT_ALL_ACTIVE = select(*_PRICE_COLUMNS).where(Price.is_active.is_(True))
+
+_STMT_DEACTIVATE_PLAN_AND_PERIOD = update(Price).where(
+    Price.plan == bindparam("match_plan"),
+    Price.billing_period == bindparam("match_billing_period"),
+    Price.paddle_price_id != bindparam("keep_paddle_price_id"),
+    Price.is_active.is_(True)
+).values(is_active=False).execution_options(
+    # Match criteria are bound at execute time, so in-session objects are
+    # synchronized from the affected primary keys rather than by evaluation.
+    synchronize_session="fetch"
+)
+
+
+@lru_cache(maxsize=16)
+def _parse_billing_period(billing_period: str) -> Optional[BillingPeriod]:
+    """
+    Parse a billing period string (case-insensitive).
+    
+    Memoized: only a handful of distinct spellings ever reach this.
+    
+    Returns:
+        BillingPeriod or None if the string is not a valid billing period
+    """
+    try:
+        return BillingPeriod(billing_period.lower())
+    except ValueError:
+        return None
+
+
+# Pre-seed the parse cache with the canonical spellings
+for _billing_period in BillingPeriod:
+    _parse_billing_period(_billing_period.value)
+
+
+# Session.info key set by price writes; the snapshot is invalidated when
+# that session's transaction commits (or rolls back) rather than mid-request
+_PRICES_WRITTEN_KEY = "price_service_prices_written"
+
+
+@event.listens_for(Price, "after_insert")
+@event.listens_for(Price, "after_update")
+@event.listens_for(Price, "after_delete")
+def _mark_prices_written(mapper, connection, target: Price) -> None:
+    """Flag ORM flushes of Price rows made outside PriceService (e.g. admin edits)."""
+    session = object_session(target)
+    if session is not None:
+        session.info[_PRICES_WRITTEN_KEY] = True
+
+
+@event.listens_for(Session, "after_commit")
+@event.listens_for(Session, "after_rollback")
+def _invalidate_snapshot_after_write(session: Session) -> None:
+    """Invalidate the active price snapshot once a price write has ended."""
+    if session.info.pop(_PRICES_WRITTEN_KEY, False):
+        PriceService.invalidate_cache()
+
+
+def _supports_writable_cte(db: Session) -> bool:
+    """
+    Check whether the database supports data-modifying statements in WITH.
+    
+    PostgreSQL does; SQLite (tests) does not.
+    """
+    return db.get_bind().dialect.name == "postgresql"
+
+
+def _upsert_prices_stmt(db: Session, rows: list[Dict[str, Any]]):
+    """
+    Build an INSERT ... ON CONFLICT (paddle_price_id) DO UPDATE for prices.
+    
+    Existing rows (matched by Paddle price ID) are updated in place and
+    reactivated. Returns the upserted Price rows.
+    
+    Args:
+        db: Database session (selects the SQL dialect)
+        rows: Price column values, one dict per row
+    """
+    insert = upsert_insert(db)
+    stmt = insert(Price).values(rows)
+    return stmt.on_conflict_do_update(
+        index_elements=[Price.paddle_price_id],
+        set_={
+            "plan": stmt.excluded.plan,
+            "billing_period": stmt.excluded.billing_period,
+            "paddle_product_id": stmt.excluded.paddle_product_id,
+            "amount": stmt.excluded.amount,
+            "currency": stmt.excluded.currency,
+            "is_active": True,
+            "updated_at": datetime.utcnow(),
+        }
+    ).returning(Price)
+
+
+def _active_snapshot(db: Session) -> tuple[Dict[tuple[str, BillingPeriod], PriceDTO], Dict[str, PriceDTO]]:
+    """
+    Get the active price snapshot, rebuilding it if stale.
+    
+    Args:
+        db: Database session used to rebuild the snapshot
+        
+    Returns:
+        Tuple of (prices by (plan, billing_period), prices by Paddle price ID)
+    """
+    global _active_prices, _active_prices_by_paddle_id, _snapshot_loaded_at
+    
+    loaded_at = _snapshot_loaded_at
+    if loaded_at is None or time.monotonic() - loaded_at >= PRICE_CACHE_TTL_SECONDS:
+        generation = _snapshot_generation
+        prices = [PriceDTO(*row) for row in db.execute(_STMT_ALL_ACTIVE)]
+        by_key = {(price.plan, price.billing_period): price for price in prices}
+        by_paddle_id = {price.paddle_price_id: price for price in prices}
+        with _snapshot_lock:
+            # Prices invalidated while loading may predate a write; use them
+            # for this call only and leave the snapshot stale
+            if generation != _snapshot_generation:
+                return by_key, by_paddle_id
+            _active_prices = by_key
+            _active_prices_by_paddle_id = by_paddle_id
+            _snapshot_loaded_at = time.monotonic()
+    
+    return _active_prices, _active_prices_by_paddle_id
+
+
+def _is_known_missing(paddle_price_id: str) -> bool:
+    """Check whether a Paddle price ID was recently looked up and not found."""
+    missed_at = _missing_paddle_ids.get(paddle_price_id)
+    return missed_at is not None and time.monotonic() - missed_at < PRICE_NEGATIVE_CACHE_TTL_SECONDS
+
+
+def _record_missing(paddle_price_id: str, generation: int) -> None:
+    """
+    Remember that a Paddle price ID was not found, dropping expired entries when full.
+    
+    Args:
+        paddle_price_id: Paddle price ID that was looked up
+        generation: Snapshot generation when the lookup started; the miss is
+            not recorded if the cache was invalidated since
+    """
+    now = time.monotonic()
+    with _snapshot_lock:
+        if generation != _snapshot_generation:
+            return
+        if len(_missing_paddle_ids) >= PRICE_NEGATIVE_CACHE_MAX_SIZE:
+            for key, missed_at in list(_missing_paddle_ids.items()):
+                if now - missed_at >= PRICE_NEGATIVE_CACHE_TTL_SECONDS:
+                    del _missing_paddle_ids[key]
+            if len(_missing_paddle_ids) >= PRICE_NEGATIVE_CACHE_MAX_SIZE:
+                _missing_paddle_ids.clear()
+        _missing_paddle_ids[paddle_price_id] = now
+
+
+def _add_to_snapshot(price: PriceDTO, generation: int) -> None:
+    """
+    Patch a price missing from the snapshot into it (copy-on-write).
+    
+    Used when a lookup misses the snapshot but finds the price in the
+    database, e.g. because another process created it.
+    
+    Args:
+        price: Price loaded from the database
+        generation: Snapshot generation when the lookup started; the price is
+            not added if the cache was invalidated since
+    """
+    global _active_prices, _active_prices_by_paddle_id
+    
+    with _snapshot_lock:
+        if generation != _snapshot_generation:
+            return
+        key = (price.plan, price.billing_period)
+        by_key = dict(_active_prices)
+        by_paddle_id = dict(_active_prices_by_paddle_id)
+        
+        replaced = by_key.get(key)
+        if replaced is not None:
+            by_paddle_id.pop(replaced.paddle_price_id, None)
+        by_key[key] = price
+        by_paddle_id[price.paddle_price_id] = price
+        
+        _active_prices = by_key
+        _active_prices_by_paddle_id = by_paddle_id
+
+
 class PriceService:
     """Service for managing prices in the database."""
     
@@ -20,7 +303,7 @@ class PriceService:
         plan: str,
         billing_period: str,
         db: Session
-    ) -> Optional[Price]:
+    ) -> Optional[PriceDTO]:
         """
         Get active price for a plan and billing period.
         
@@ -30,26 +313,35 @@ class PriceService:
             db: Database session
             
         Returns:
-            Price object or None if not found
+            PriceDTO or None if not found
         """
-        try:
-            billing_period_enum = BillingPeriod(billing_period.lower())
-        except ValueError:
+        billing_period_enum = _parse_billing_period(billing_period)
+        if billing_period_enum is None:
             return None
         
-        price = db.query(Price).filter(
-            Price.plan == plan,
-            Price.billing_period == billing_period_enum,
-            Price.is_active == True
+        active_prices, _ = _active_snapshot(db)
+        price = active_prices.get((plan, billing_period_enum))
+        if price is not None:
+            return price
+        
+        # Not in the snapshot - fall back to the database
+        generation = _snapshot_generation
+        row = db.execute(
+            _STMT_ACTIVE_BY_PLAN_AND_PERIOD,
+            {"match_plan": plan, "match_billing_period": billing_period_enum}
         ).first()
+        if row is None:
+            return None
         
+        price = PriceDTO(*row)
+        _add_to_snapshot(price, generation)
         return price
     
     @staticmethod
     def get_price_by_paddle_id(
         paddle_price_id: str,
         db: Session
-    ) -> Optional[Price]:
+    ) -> Optional[PriceDTO]:
         """
         Get price by Paddle price ID.
         
@@ -58,15 +350,31 @@ class PriceService:
             db: Database session
             
         Returns:
-            Price object or None if not found
+            PriceDTO or None if not found
         """
-        return db.query(Price).filter(
-            Price.paddle_price_id == paddle_price_id,
-            Price.is_active == True
+        _, active_prices_by_paddle_id = _active_snapshot(db)
+        price = active_prices_by_paddle_id.get(paddle_price_id)
+        if price is not None:
+            return price
+        if _is_known_missing(paddle_price_id):
+            return None
+        
+        # Not in the snapshot - fall back to the database
+        generation = _snapshot_generation
+        row = db.execute(
+            _STMT_ACTIVE_BY_PADDLE_ID,
+            {"match_paddle_price_id": paddle_price_id}
         ).first()
+        if row is None:
+            _record_missing(paddle_price_id, generation)
+            return None
+        
+        price = PriceDTO(*row)
+        _add_to_snapshot(price, generation)
+        return price
     
     @staticmethod
-    def get_all_active_prices(db: Session) -> list[Price]:
+    def get_all_active_prices(db: Session) -> list[PriceDTO]:
         """
         Get all active prices.
         
@@ -74,12 +382,37 @@ class PriceService:
             db: Database session
             
         Returns:
-            List of active Price objects
+            List of active PriceDTOs
+        """
+        active_prices, _ = _active_snapshot(db)
+        return list(active_prices.values())
+    
+    @staticmethod
+    def get_prices_for_plans(plans: list[str], db: Session) -> Dict[str, list[PriceDTO]]:
+        """
+        Get all active prices for several plans at once.
+        
+        Prefer this over calling get_prices_by_plan per plan when rendering
+        a list of plans: it makes a single pass over the active price
+        snapshot (loaded with one query when stale).
+        
+        Args:
+            plans: Subscription plans
+            db: Database session
+            
+        Returns:
+            Dict mapping each plan with active prices to its list of PriceDTOs
         """
-        return db.query(Price).filter(Price.is_active == True).all()
+        wanted = set(plans)
+        active_prices, _ = _active_snapshot(db)
+        prices_by_plan = defaultdict(list)
+        for price in active_prices.values():
+            if price.plan in wanted:
+                prices_by_plan[price.plan].append(price)
+        return dict(prices_by_plan)
     
     @staticmethod
-    def get_prices_by_plan(plan: str, db: Session) -> list[Price]:
+    def get_prices_by_plan(plan: str, db: Session) -> list[PriceDTO]:
         """
         Get all active prices for a plan (monthly and yearly).
         
@@ -88,12 +421,58 @@ class PriceService:
             db: Database session
             
         Returns:
-            List of Price objects
+            List of PriceDTOs
+        """
+        return PriceService.get_prices_for_plans([plan], db).get(plan, [])
+    
+    @staticmethod
+    def get_plan_with_prices(plan: str, db: Session) -> Optional[Dict[str, Any]]:
+        """
+        Get a plan together with its active monthly and yearly prices.
+        
+        Flattens both prices onto one record so pricing and checkout pages
+        get everything for a plan from a single (cached) lookup.
+        
+        Args:
+            plan: Subscription plan
+            db: Database session
+            
+        Returns:
+            Dict with plan and per-period amount/Paddle price ID,
+            or None if the plan has no active prices
+        """
+        prices = PriceService.get_prices_by_plan(plan, db)
+        if not prices:
+            return None
+        
+        plan_with_prices = {
+            "plan": plan,
+            "monthly_amount_cents": None,
+            "monthly_paddle_price_id": None,
+            "yearly_amount_cents": None,
+            "yearly_paddle_price_id": None,
+        }
+        for price in prices:
+            period = price.billing_period.value
+            plan_with_prices[f"{period}_amount_cents"] = price.amount
+            plan_with_prices[f"{period}_paddle_price_id"] = price.paddle_price_id
+        
+        return plan_with_prices
+    
+    @staticmethod
+    def invalidate_cache() -> None:
+        """
+        Mark the active price snapshot stale so the next read rebuilds it,
+        and forget Paddle price IDs recently recorded as missing.
+        
+        Called when a transaction that wrote prices through this service ends.
         """
-        return db.query(Price).filter(
-            Price.plan == plan,
-            Price.is_active == True
-        ).all()
+        global _snapshot_loaded_at, _snapshot_generation
+        
+        with _snapshot_lock:
+            _snapshot_generation += 1
+            _snapshot_loaded_at = None
+            _missing_paddle_ids.clear()
     
     @staticmethod
     def create_or_update_price(
@@ -108,6 +487,10 @@ class PriceService:
         """
         Create or update a price in the database.
         
+        Does not commit: the caller owns the transaction (the price route
+        commits before responding). The active price snapshot is invalidated
+        when that transaction ends.
+        
         Args:
             plan: Subscription plan
             billing_period: Billing period (monthly, yearly)
@@ -120,51 +503,148 @@ class PriceService:
         Returns:
             Created or updated Price object
         """
-        try:
-            billing_period_enum = BillingPeriod(billing_period.lower())
-        except ValueError:
+        billing_period_enum = _parse_billing_period(billing_period)
+        if billing_period_enum is None:
             raise ValueError(f"Invalid billing period: {billing_period}")
         
-        # Check if price already exists
-        existing = db.query(Price).filter(
-            Price.paddle_price_id == paddle_price_id
-        ).first()
-        
-        if existing:
-            # Update existing price
-            existing.plan = plan
-            existing.billing_period = billing_period_enum
-            existing.amount = amount
-            existing.currency = currency
-            existing.paddle_product_id = paddle_product_id
-            existing.is_active = True
-            db.commit()
-            db.refresh(existing)
-            return existing
+        # Insert the price, or update it in place if the Paddle price ID exists
+        stmt = _upsert_prices_stmt(db, [{
+            "plan": plan,
+            "billing_period": billing_period_enum,
+            "paddle_price_id": paddle_price_id,
+            "paddle_product_id": paddle_product_id,
+            "amount": amount,
+            "currency": currency,
+            "is_active": True,
+        }])
         
         # Ensure only one active price per plan/billing_period combination
-        # Deactivate any existing active prices for this plan/billing_period
-        db.query(Price).filter(
-            Price.plan == plan,
-            Price.billing_period == billing_period_enum,
-            Price.is_active == True
-        ).update({"is_active": False})
-        db.commit()
-        
-        # Create new price
-        price = Price(
-            plan=plan,
-            billing_period=billing_period_enum,
-            paddle_price_id=paddle_price_id,
-            paddle_product_id=paddle_product_id,
-            amount=amount,
-            currency=currency,
-            is_active=True
-        )
+        # Deactivate any other active prices for this plan/billing_period in
+        # the same transaction, so there is never a moment with no active price.
+        # Keyed on the incoming Paddle price ID, so it doesn't depend on the
+        # row returned by the upsert.
+        if _supports_writable_cte(db):
+            # One round-trip: WITH deactivated AS (UPDATE ...) INSERT ... RETURNING
+            deactivate = update(Price.__table__).where(
+                Price.plan == plan,
+                Price.billing_period == billing_period_enum,
+                Price.paddle_price_id != paddle_price_id,
+                Price.is_active.is_(True)
+            ).values(is_active=False)
+            price = db.execute(
+                stmt.add_cte(deactivate.cte("deactivated_prices")),
+                execution_options={"populate_existing": True}
+            ).scalar_one()
+        else:
+            price = db.execute(
+                stmt,
+                execution_options={"populate_existing": True}
+            ).scalar_one()
+            db.execute(
+                _STMT_DEACTIVATE_PLAN_AND_PERIOD,
+                {
+                    "match_plan": plan,
+                    "match_billing_period": billing_period_enum,
+                    "keep_paddle_price_id": paddle_price_id,
+                }
+            )
         
-        db.add(price)
-        db.commit()
-        db.refresh(price)
+        # RETURNING already loaded every column; detach the row so the caller's
+        # commit doesn't expire it and it can be read without a reload
+        db.expunge(price)
+        db.info[_PRICES_WRITTEN_KEY] = True
         
         return price
-
+    
+    @staticmethod
+    def create_or_update_prices(
+        items: list[Dict[str, Any]],
+        db: Session
+    ) -> list[Price]:
+        """
+        Create or update several prices at once.
+        
+        Batched form of create_or_update_price for Paddle syncs: one
+        multi-row upsert, one UPDATE deactivating the other active prices
+        for the affected plan/billing_period pairs (sent as a single
+        statement on PostgreSQL). Like create_or_update_price, it does not
+        commit.
+        
+        Args:
+            items: Price dicts with keys plan, billing_period, paddle_price_id,
+                amount, and optionally currency (default USD) and paddle_product_id
+            db: Database session
+            
+        Returns:
+            Created or updated Price objects, in the same order as items
+            
+        Raises:
+            ValueError: If a billing period is invalid, or a Paddle price ID or
+                plan/billing_period pair appears more than once
+        """
+        if not items:
+            return []
+        
+        rows = []
+        plan_periods = set()
+        paddle_price_ids = set()
+        for item in items:
+            billing_period_enum = _parse_billing_period(item["billing_period"])
+            if billing_period_enum is None:
+                raise ValueError(f"Invalid billing period: {item['billing_period']}")
+            
+            plan_period = (item["plan"], billing_period_enum)
+            if plan_period in plan_periods:
+                raise ValueError(
+                    f"Duplicate price for plan {item['plan']} ({billing_period_enum.value})"
+                )
+            if item["paddle_price_id"] in paddle_price_ids:
+                raise ValueError(f"Duplicate Paddle price ID: {item['paddle_price_id']}")
+            plan_periods.add(plan_period)
+            paddle_price_ids.add(item["paddle_price_id"])
+            
+            rows.append({
+                "plan": item["plan"],
+                "billing_period": billing_period_enum,
+                "paddle_price_id": item["paddle_price_id"],
+                "paddle_product_id": item.get("paddle_product_id"),
+                "amount": item["amount"],
+                "currency": item.get("currency", "USD"),
+                "is_active": True,
+            })
+        
+        # Insert all prices, updating in place those whose Paddle price ID
+        # exists, and deactivate every other active price for the affected
+        # plan/billing_period pairs
+        stmt = _upsert_prices_stmt(db, rows)
+        deactivate_where = (
+            tuple_(Price.plan, Price.billing_period).in_(list(plan_periods)),
+            Price.paddle_price_id.not_in(list(paddle_price_ids)),
+            Price.is_active.is_(True)
+        )
+        if _supports_writable_cte(db):
+            # Both statements in one round-trip; they touch disjoint rows
+            deactivate = update(Price.__table__).where(*deactivate_where).values(is_active=False)
+            prices = db.execute(
+                stmt.add_cte(deactivate.cte("deactivated_prices")),
+                execution_options={"populate_existing": True}
+            ).scalars().all()
+        else:
+            prices = db.execute(
+                stmt,
+                execution_options={"populate_existing": True}
+            ).scalars().all()
+            db.execute(
+                update(Price).where(*deactivate_where)
+                .values(is_active=False).execution_options(synchronize_session="fetch")
+            )
+        
+        # RETURNING already loaded every column; detach the rows so the caller's
+        # commit doesn't expire them and they can be read without a reload
+        for price in prices:
+            db.expunge(price)
+        db.info[_PRICES_WRITTEN_KEY] = True
+        
+        # RETURNING order is not guaranteed for multi-row inserts
+        by_paddle_id = {price.paddle_price_id: price for price in prices}
+        return [by_paddle_id[row["paddle_price_id"]] for row in rows]
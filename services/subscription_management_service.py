@@ -12,18 +12,26 @@ Handles subscription lifecycle management:
 
 from typing import List, Dict, Any, Optional
 from datetime import datetime, timedelta, timezone
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from dateutil.relativedelta import relativedelta
 from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_
+from sqlalchemy import and_, or_, func
+from paddle_billing.Resources.Subscriptions.Operations import ListSubscriptions
+from paddle_billing.Resources.Shared.Operations import Pager
 
 from models.subscription import Subscription, SubscriptionStatus, SubscriptionPlan
 from models.payment import Payment, PaymentStatus
 from models.user import User
-from models.usage_metric import UsageMetric
+from models.usage_metric import UsageMetric, MONTHLY_METRIC_TYPES
 from models.keyword_search import KeywordSearch
+from models.opportunity import Opportunity
 from services.payment_service import PaymentService
 from services.price_service import PriceService
 from services.usage_service import UsageService
+from services.billing_periods import current_month_bounds
 from models.price import BillingPeriod
+from core.database import upsert_insert
 from core.logger import get_logger
 from core.config import get_settings
 
@@ -31,6 +39,169 @@ settings = get_settings()
 logger = get_logger(__name__)
 
 
+def _fetch_paddle_subscription(paddle, paddle_subscription_id: str):
+    """
+    Fetch one subscription from Paddle, returning the exception instead of raising.
+    
+    Runs on sync worker threads; it only talks to Paddle and never touches the
+    database session, so results are applied to ORM objects on the caller's thread.
+    
+    Args:
+        paddle: Paddle SDK client (shared; its HTTP session is thread-safe)
+        paddle_subscription_id: Paddle subscription ID
+        
+    Returns:
+        Paddle subscription object, or the exception raised while fetching it
+    """
+    try:
+        return paddle.subscriptions.get(paddle_subscription_id)
+    except Exception as e:
+        return e
+
+
+# Subscription IDs requested per Paddle list call (Paddle allows up to 200 per page)
+PADDLE_LIST_PAGE_SIZE = 100
+
+
+def _list_paddle_subscriptions(paddle, paddle_subscription_ids: List[str]):
+    """
+    Fetch several subscriptions from Paddle with one list request, filtered by ID.
+    
+    Args:
+        paddle: Paddle SDK client
+        paddle_subscription_ids: Up to PADDLE_LIST_PAGE_SIZE Paddle subscription IDs
+        
+    Returns:
+        Dict of Paddle subscription objects by ID, or the exception raised
+    """
+    try:
+        return {
+            paddle_sub.id: paddle_sub
+            for paddle_sub in paddle.subscriptions.list(ListSubscriptions(
+                ids=paddle_subscription_ids,
+                pager=Pager(per_page=len(paddle_subscription_ids))
+            ))
+        }
+    except Exception as e:
+        return e
+
+
+def _fetch_paddle_subscriptions(paddle, paddle_subscription_ids: List[str], executor) -> Dict[str, Any]:
+    """
+    Fetch subscriptions from Paddle, PADDLE_LIST_PAGE_SIZE per request.
+    
+    List requests run concurrently on the executor. IDs a list request didn't
+    return (or whose list request failed) fall back to one get request each,
+    so per-subscription errors are still reported.
+    
+    Args:
+        paddle: Paddle SDK client
+        paddle_subscription_ids: Paddle subscription IDs
+        executor: Thread pool for the HTTP requests
+        
+    Returns:
+        Dict of Paddle subscription object (or fetch exception) by ID
+    """
+    chunks = [
+        paddle_subscription_ids[i:i + PADDLE_LIST_PAGE_SIZE]
+        for i in range(0, len(paddle_subscription_ids), PADDLE_LIST_PAGE_SIZE)
+    ]
+    
+    paddle_subs = {}
+    for listed in executor.map(lambda chunk: _list_paddle_subscriptions(paddle, chunk), chunks):
+        if isinstance(listed, Exception):
+            logger.warning(f"Paddle subscription list request failed, falling back to single gets: {str(listed)}")
+            continue
+        paddle_subs.update(listed)
+    
+    missing_ids = [i for i in paddle_subscription_ids if i not in paddle_subs]
+    for paddle_subscription_id, paddle_sub in zip(
+        missing_ids,
+        executor.map(lambda i: _fetch_paddle_subscription(paddle, i), missing_ids)
+    ):
+        paddle_subs[paddle_subscription_id] = paddle_sub
+    
+    return paddle_subs
+
+
+def _as_utc_naive(dt: datetime) -> datetime:
+    """
+    Convert a datetime to naive UTC, the form stored in the database.
+    
+    Naive datetimes are assumed to already be UTC; aware ones are converted.
+    """
+    if dt.tzinfo is None:
+        return dt
+    return dt.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+# Rows loaded per query when scanning subscriptions in management jobs
+SUBSCRIPTION_SCAN_BATCH_SIZE = 500
+
+
+def _subscription_batches(query, batch_size: int = SUBSCRIPTION_SCAN_BATCH_SIZE):
+    """
+    Yield the subscriptions matching a query in batches, ordered by ID.
+    
+    Uses keyset pagination (id > last seen id) rather than one big .all() or
+    a server-side cursor, so callers can commit between batches and modify
+    columns used in the query's filter without skipping rows.
+    
+    Args:
+        query: Subscription query (filters only, no ordering or limit)
+        batch_size: Maximum subscriptions per batch
+        
+    Yields:
+        Lists of Subscription objects
+    """
+    last_id = None
+    while True:
+        batch_query = query if last_id is None else query.filter(Subscription.id > last_id)
+        batch = batch_query.order_by(Subscription.id).limit(batch_size).all()
+        if not batch:
+            return
+        # Read before yielding: the caller may commit or roll back, expiring the rows
+        last_id = batch[-1].id
+        yield batch
+        if len(batch) < batch_size:
+            return
+
+
+# Map Paddle subscription status to our status (shared by the sync and past_due jobs)
+_PADDLE_STATUS_MAP: Dict[str, SubscriptionStatus] = {
+    "active": SubscriptionStatus.ACTIVE,
+    "canceled": SubscriptionStatus.CANCELLED,
+    "past_due": SubscriptionStatus.PAST_DUE,
+    "trialing": SubscriptionStatus.TRIALING,
+    "paused": SubscriptionStatus.CANCELLED,  # Treat paused as cancelled
+}
+
+
+@lru_cache(maxsize=64)
+def _normalize_paddle_status(paddle_status) -> Optional[SubscriptionStatus]:
+    """
+    Map a Paddle subscription status to our SubscriptionStatus.
+    
+    The Paddle SDK returns enum objects (possibly wrapping another enum), but
+    plain strings are accepted too. Only a handful of distinct statuses exist,
+    so the conversion is cached per input.
+    
+    Args:
+        paddle_status: Status from the Paddle SDK (enum or string)
+        
+    Returns:
+        Matching SubscriptionStatus, or None if the status is not mapped
+    """
+    # Handle both enum objects (with .value) and string values
+    status_value = getattr(paddle_status, 'value', paddle_status)
+    # If it's still an enum, get its value
+    status_value = getattr(status_value, 'value', status_value)
+    
+    # Clean up the string (remove any enum class prefixes)
+    paddle_status_str = str(status_value).lower().replace('subscriptionstatus.', '').replace('status.', '')
+    return _PADDLE_STATUS_MAP.get(paddle_status_str)
+
+
 class SubscriptionManagementService:
     """Service for managing subscription lifecycle."""
     
@@ -61,119 +232,105 @@ class SubscriptionManagementService:
             paddle = PaymentService.get_paddle_client()
             
             # Get all active subscriptions with Paddle subscription IDs
-            subscriptions = db.query(Subscription).filter(
+            subscriptions_query = db.query(Subscription).filter(
                 and_(
                     Subscription.status == SubscriptionStatus.ACTIVE,
                     Subscription.paddle_subscription_id.isnot(None)
                 )
-            ).all()
+            )
             
             synced_count = 0
             updated_count = 0
             errors = []
             
-            for subscription in subscriptions:
-                try:
-                    # Fetch subscription from Paddle
-                    paddle_sub = paddle.subscriptions.get(subscription.paddle_subscription_id)
-                    
-                    # Map Paddle status to our status
-                    status_map = {
-                        "active": SubscriptionStatus.ACTIVE,
-                        "canceled": SubscriptionStatus.CANCELLED,
-                        "past_due": SubscriptionStatus.PAST_DUE,
-                        "trialing": SubscriptionStatus.TRIALING,
-                        "paused": SubscriptionStatus.CANCELLED,  # Treat paused as cancelled
-                    }
+            with ThreadPoolExecutor(
+                max_workers=settings.PADDLE_SYNC_WORKERS,
+                thread_name_prefix="paddle-sync"
+            ) as executor:
+                for subscriptions in _subscription_batches(subscriptions_query):
+                    # Fetch the batch from Paddle concurrently, many per request - the sync
+                    # is dominated by HTTP round-trips, not by the database updates below
+                    paddle_subs = _fetch_paddle_subscriptions(
+                        paddle,
+                        [s.paddle_subscription_id for s in subscriptions],
+                        executor
+                    )
                     
-                    paddle_status = getattr(paddle_sub, 'status', None)
-                    # Convert enum to string if needed (Paddle SDK returns enum objects)
-                    if paddle_status is not None:
-                        # Handle both enum objects (with .value) and string values
+                    renewed_subscriptions = []
+                    batch_synced_count = 0
+                    batch_updated_count = 0
+                    for subscription in subscriptions:
+                        paddle_sub = paddle_subs[subscription.paddle_subscription_id]
                         try:
-                            if hasattr(paddle_status, 'value'):
-                                # Get the value attribute (could be string or another enum)
-                                status_value = paddle_status.value
-                                # If it's still an enum, get its value recursively
-                                if hasattr(status_value, 'value'):
-                                    paddle_status_str = str(status_value.value).lower()
-                                else:
-                                    paddle_status_str = str(status_value).lower()
-                            else:
-                                # It's already a string or other type
-                                paddle_status_str = str(paddle_status).lower()
+                            if isinstance(paddle_sub, Exception):
+                                raise paddle_sub
                             
-                            # Clean up the string (remove any enum class prefixes)
-                            paddle_status_str = paddle_status_str.replace('subscriptionstatus.', '').replace('status.', '')
-                            
-                            if paddle_status_str in status_map:
-                                new_status = status_map[paddle_status_str]
-                                if subscription.status != new_status:
-                                    subscription.status = new_status
-                                    updated_count += 1
-                                    logger.info(
-                                        f"Updated subscription {subscription.id} status: "
-                                        f"{subscription.status.value} -> {new_status.value}"
+                            paddle_status = getattr(paddle_sub, 'status', None)
+                            if paddle_status is not None:
+                                try:
+                                    new_status = _normalize_paddle_status(paddle_status)
+                                    old_status = subscription.status
+                                    if new_status is not None and old_status != new_status:
+                                        subscription.status = new_status
+                                        batch_updated_count += 1
+                                        logger.info(
+                                            f"Updated subscription {subscription.id} status: "
+                                            f"{old_status.value} -> {new_status.value}"
+                                        )
+                                except Exception as e:
+                                    logger.warning(
+                                        f"Error processing paddle_status for subscription {subscription.id}: {str(e)}, "
+                                        f"paddle_status type: {type(paddle_status)}, value: {paddle_status}"
                                     )
+                            
+                            # Update billing period dates if available
+                            old_period_start = subscription.current_period_start
+                            if hasattr(paddle_sub, 'current_billing_period'):
+                                period = paddle_sub.current_billing_period
+                                if period:
+                                    if hasattr(period, 'starts_at') and period.starts_at:
+                                        # Database datetimes are naive UTC, Paddle datetimes may be aware
+                                        new_period_start = _as_utc_naive(period.starts_at)
+                                        
+                                        # Check if billing period renewed (new period started)
+                                        if old_period_start and new_period_start > _as_utc_naive(old_period_start):
+                                            # Billing period renewed - reset keyword search limits
+                                            # once the batch is applied (see below)
+                                            renewed_subscriptions.append(subscription)
+                                        
+                                        subscription.current_period_start = new_period_start
+                                    if hasattr(period, 'ends_at') and period.ends_at:
+                                        period_ends_at = _as_utc_naive(period.ends_at)
+                                        subscription.current_period_end = period_ends_at
+                                        subscription.next_billing_date = period_ends_at
+                            
+                            batch_synced_count += 1
+                            
                         except Exception as e:
-                            logger.warning(
-                                f"Error processing paddle_status for subscription {subscription.id}: {str(e)}, "
-                                f"paddle_status type: {type(paddle_status)}, value: {paddle_status}"
-                            )
+                            error_msg = f"Error syncing subscription {subscription.id}: {str(e)}"
+                            logger.error(error_msg, exc_info=True)
+                            errors.append(error_msg)
                     
-                    # Update billing period dates if available
-                    old_period_start = subscription.current_period_start
-                    if hasattr(paddle_sub, 'current_billing_period'):
-                        period = paddle_sub.current_billing_period
-                        if period:
-                            if hasattr(period, 'starts_at') and period.starts_at:
-                                new_period_start = period.starts_at
-                                
-                                # Normalize datetimes to UTC-aware for comparison
-                                # Database datetime is naive (UTC), Paddle datetime may be aware
-                                if old_period_start:
-                                    # Ensure old_period_start is timezone-aware (UTC)
-                                    if old_period_start.tzinfo is None:
-                                        old_period_start_aware = old_period_start.replace(tzinfo=timezone.utc)
-                                    else:
-                                        old_period_start_aware = old_period_start.astimezone(timezone.utc)
-                                else:
-                                    old_period_start_aware = None
-                                
-                                # Ensure new_period_start is timezone-aware (UTC)
-                                if new_period_start.tzinfo is None:
-                                    new_period_start_aware = new_period_start.replace(tzinfo=timezone.utc)
-                                else:
-                                    new_period_start_aware = new_period_start.astimezone(timezone.utc)
-                                
-                                # Check if billing period renewed (new period started)
-                                if old_period_start_aware and new_period_start_aware > old_period_start_aware:
-                                    # Billing period renewed - reset keyword search limits
-                                    SubscriptionManagementService.reset_keyword_search_limits_on_renewal(
-                                        subscription, db
-                                    )
-                                
-                                # Store as naive datetime (database expects naive UTC)
-                                subscription.current_period_start = new_period_start_aware.replace(tzinfo=None)
-                            if hasattr(period, 'ends_at') and period.ends_at:
-                                period_ends_at = period.ends_at
-                                # Normalize to UTC-aware, then convert to naive for database
-                                if period_ends_at.tzinfo is None:
-                                    period_ends_at_aware = period_ends_at.replace(tzinfo=timezone.utc)
-                                else:
-                                    period_ends_at_aware = period_ends_at.astimezone(timezone.utc)
-                                # Store as naive datetime (database expects naive UTC)
-                                subscription.current_period_end = period_ends_at_aware.replace(tzinfo=None)
-                                subscription.next_billing_date = period_ends_at_aware.replace(tzinfo=None)
-                    
-                    synced_count += 1
+                    # Commit per batch to keep the transaction (and identity map) small.
+                    # A batch that fails to apply is rolled back and reported; the
+                    # remaining batches are still synced.
+                    try:
+                        # Reset keyword search limits for the batch's renewed subscriptions
+                        # in one go, now that their new period start/end are set
+                        if renewed_subscriptions:
+                            SubscriptionManagementService.reset_keyword_search_limits_on_renewals(
+                                renewed_subscriptions, db
+                            )
+                        db.commit()
+                    except Exception as e:
+                        db.rollback()
+                        error_msg = f"Error applying sync batch of {len(subscriptions)} subscriptions: {str(e)}"
+                        logger.error(error_msg, exc_info=True)
+                        errors.append(error_msg)
+                        continue
                     
-                except Exception as e:
-                    error_msg = f"Error syncing subscription {subscription.id}: {str(e)}"
-                    logger.error(error_msg, exc_info=True)
-                    errors.append(error_msg)
-            
-            db.commit()
+                    synced_count += batch_synced_count
+                    updated_count += batch_updated_count
             
             return {
                 "status": "success",
@@ -207,35 +364,46 @@ class SubscriptionManagementService:
         """
         now = datetime.utcnow()
         
-        # Find active subscriptions that have passed their period end
-        expired_subscriptions = db.query(Subscription).filter(
+        # Active subscriptions that have passed their period end
+        expired_query = db.query(Subscription).filter(
             and_(
                 Subscription.status == SubscriptionStatus.ACTIVE,
                 Subscription.current_period_end.isnot(None),
                 Subscription.current_period_end < now,
-                Subscription.plan != SubscriptionPlan.FREE  # Free plan handled separately
+                Subscription.plan != SubscriptionPlan.FREE  # Free plan handled below
             )
-        ).all()
+        )
         
-        expired_count = 0
-        for subscription in expired_subscriptions:
-            # Check if subscription should be cancelled or expired
-            if subscription.cancel_at_period_end:
-                subscription.status = SubscriptionStatus.CANCELLED
-                logger.info(f"Marked subscription {subscription.id} as cancelled (cancel_at_period_end=True)")
-            else:
-                # Check if there's a Paddle subscription - if so, Paddle handles renewal
-                # If no Paddle subscription, mark as expired
-                if not subscription.paddle_subscription_id:
-                    subscription.status = SubscriptionStatus.EXPIRED
-                    logger.info(f"Marked subscription {subscription.id} as expired (no Paddle subscription)")
-                # If Paddle subscription exists, Paddle will handle renewal via webhook
-                # We'll sync status in sync_subscriptions_with_paddle
-            
-            expired_count += 1
+        # Subscriptions set to cancel at period end are cancelled
+        cancelled_count = expired_query.filter(
+            Subscription.cancel_at_period_end.is_(True)
+        ).update({"status": SubscriptionStatus.CANCELLED}, synchronize_session=False)
+        
+        # Subscriptions without a Paddle subscription are expired. If a Paddle
+        # subscription exists, Paddle handles renewal via webhook and we sync
+        # status in sync_subscriptions_with_paddle
+        no_paddle_expired_count = expired_query.filter(
+            Subscription.cancel_at_period_end.is_(False),
+            Subscription.paddle_subscription_id.is_(None)
+        ).update({"status": SubscriptionStatus.EXPIRED}, synchronize_session=False)
+        
+        # Free tier subscriptions past their 1-month period are expired
+        # (SubscriptionService.get_active_subscription already ignores them)
+        free_expired_count = db.query(Subscription).filter(
+            Subscription.status == SubscriptionStatus.ACTIVE,
+            Subscription.plan == SubscriptionPlan.FREE,
+            Subscription.current_period_end < now
+        ).update({"status": SubscriptionStatus.EXPIRED}, synchronize_session=False)
         
         db.commit()
         
+        expired_count = cancelled_count + no_paddle_expired_count + free_expired_count
+        logger.info(
+            f"Marked {cancelled_count} subscriptions as cancelled (cancel_at_period_end=True), "
+            f"{no_paddle_expired_count} as expired (no Paddle subscription) "
+            f"and {free_expired_count} free tier subscriptions as expired"
+        )
+        
         return {
             "status": "success",
             "expired_count": expired_count
@@ -254,6 +422,11 @@ class SubscriptionManagementService:
         Returns:
             Dict with processing results
         """
+        now = datetime.utcnow()
+        
+        # Check Paddle once for the whole run rather than per subscription
+        paddle = PaymentService.get_paddle_client() if PaymentService.is_paddle_enabled() else None
+        
         # Find past_due subscriptions
         past_due_subscriptions = db.query(Subscription).filter(
             Subscription.status == SubscriptionStatus.PAST_DUE
@@ -267,7 +440,7 @@ class SubscriptionManagementService:
             try:
                 # If subscription has been past_due for more than 7 days, mark as expired
                 if subscription.last_billing_date:
-                    days_past_due = (datetime.utcnow() - subscription.last_billing_date).days
+                    days_past_due = (now - subscription.last_billing_date).days
                     if days_past_due > 7:
                         subscription.status = SubscriptionStatus.EXPIRED
                         expired_count += 1
@@ -283,31 +456,24 @@ class SubscriptionManagementService:
                     # Sync with Paddle to get latest status
                     try:
                         # Check if Paddle is enabled
-                        if not PaymentService.is_paddle_enabled():
+                        if paddle is None:
                             logger.warning(f"Paddle is disabled. Skipping sync for subscription {subscription.id}.")
                             continue
                         
-                        paddle = PaymentService.get_paddle_client()
                         paddle_sub = paddle.subscriptions.get(subscription.paddle_subscription_id)
                         paddle_status = getattr(paddle_sub, 'status', None)
                         
-                        # Convert enum to string if needed (Paddle SDK returns enum objects)
                         if paddle_status:
-                            # Handle both enum objects (with .value) and string values
-                            if hasattr(paddle_status, 'value'):
-                                paddle_status_str = paddle_status.value
-                            else:
-                                paddle_status_str = str(paddle_status).lower()
-                            
-                            if paddle_status_str == "active":
+                            new_status = _normalize_paddle_status(paddle_status)
+                            if new_status is SubscriptionStatus.ACTIVE:
                                 subscription.status = SubscriptionStatus.ACTIVE
                                 subscription.last_billing_status = "completed"
                                 retried_count += 1
                                 logger.info(f"Subscription {subscription.id} payment retried successfully")
-                            elif paddle_status_str == "past_due":
+                            elif new_status is SubscriptionStatus.PAST_DUE:
                                 # Still past_due, Paddle will retry
                                 logger.info(f"Subscription {subscription.id} still past_due, Paddle will retry")
-                            elif paddle_status_str == "canceled":
+                            elif new_status is SubscriptionStatus.CANCELLED:
                                 subscription.status = SubscriptionStatus.CANCELLED
                                 logger.info(f"Subscription {subscription.id} cancelled by Paddle")
                     except Exception as e:
@@ -344,20 +510,19 @@ class SubscriptionManagementService:
         now = datetime.utcnow()
         renewal_date = now + timedelta(days=days_ahead)
         
-        # Find subscriptions with renewals in the next N days
-        upcoming_renewals = db.query(Subscription).filter(
+        # Count subscriptions with renewals in the next N days
+        renewal_count = db.query(func.count(Subscription.id)).filter(
             and_(
                 Subscription.status == SubscriptionStatus.ACTIVE,
                 Subscription.next_billing_date.isnot(None),
                 Subscription.next_billing_date <= renewal_date,
                 Subscription.next_billing_date > now
             )
-        ).all()
-        
-        renewal_count = len(upcoming_renewals)
+        ).scalar()
         
         # TODO: Send renewal reminder emails
-        # This can be implemented later if needed
+        # This can be implemented later if needed (select only
+        # Subscription.id, user_id and next_billing_date rather than full rows)
         
         return {
             "status": "success",
@@ -383,6 +548,9 @@ class SubscriptionManagementService:
         They continue to count toward the concurrent limit (keyword_searches) in the new period.
         Only the creation limit (keyword_searches_created_per_month) is reset to 0.
         
+        Commits the session; if the reset fails, the session is rolled back
+        and an error result is returned.
+        
         Args:
             subscription: Subscription that just renewed
             db: Database session
@@ -396,118 +564,143 @@ class SubscriptionManagementService:
                 "message": "Subscription has no current_period_start"
             }
         
-        now = datetime.utcnow()
-        current_period_start = subscription.current_period_start
+        try:
+            result = SubscriptionManagementService.reset_keyword_search_limits_on_renewals(
+                [subscription], db
+            )
+            db.commit()
+            return result
+            
+        except Exception as e:
+            db.rollback()
+            logger.error(
+                f"Error resetting keyword search limits for subscription {subscription.id}: {str(e)}",
+                exc_info=True
+            )
+            return {
+                "status": "error",
+                "message": str(e),
+                "reset_metrics": 0,
+                "deleted_searches": 0
+            }
+    
+    @staticmethod
+    def reset_keyword_search_limits_on_renewals(
+        subscriptions: List[Subscription],
+        db: Session
+    ) -> Dict[str, Any]:
+        """
+        Reset keyword search limits for several renewed subscriptions at once.
+        
+        Batched form of reset_keyword_search_limits_on_renewal (used by the
+        Paddle sync): a fixed number of statements per call, including one
+        multi-row INSERT for the new usage metrics. Subscriptions without a
+        current_period_start are skipped.
+        
+        Does not commit: the caller owns the transaction, and commits or rolls
+        back the reset together with its own changes. Errors are raised.
         
-        # Calculate previous billing period end (just before current period started)
-        previous_period_end = current_period_start - timedelta(seconds=1)
+        Args:
+            subscriptions: Subscriptions that just renewed (current_period_start
+                already set to the new period)
+            db: Database session
+            
+        Returns:
+            Dict with reset results
+            
+        Raises:
+            SQLAlchemyError: If a reset statement fails
+        """
+        subscriptions = [s for s in subscriptions if s.current_period_start]
+        if not subscriptions:
+            return {
+                "status": "skipped",
+                "message": "No subscriptions with a current_period_start"
+            }
         
+        metric_type = "keyword_searches_created_per_month"
         reset_count = 0
-        deleted_count = 0
         
-        try:
-            # 1. Reset keyword_searches_created_per_month usage metric for new billing period
-            # Delete old metric if it exists (shouldn't, but just in case)
-            old_metric = db.query(UsageMetric).filter(
+        # 1. Reset keyword_searches_created_per_month usage metric for new billing period
+        # Delete old metrics if they exist (shouldn't, but just in case)
+        reset_count += db.query(UsageMetric).filter(
+            UsageMetric.metric_type == metric_type,
+            or_(*(
                 and_(
                     UsageMetric.user_id == subscription.user_id,
                     UsageMetric.subscription_id == subscription.id,
-                    UsageMetric.metric_type == "keyword_searches_created_per_month",
-                    UsageMetric.period_start < current_period_start
+                    UsageMetric.period_start < subscription.current_period_start
                 )
-            ).first()
-            
-            if old_metric:
-                db.delete(old_metric)
-                reset_count += 1
+                for subscription in subscriptions
+            ))
+        ).delete(synchronize_session=False)
+        
+        # Create new usage metrics for current billing period in one INSERT;
+        # metrics that already exist are skipped by ON CONFLICT DO NOTHING
+        new_metrics = []
+        for subscription in subscriptions:
+            current_period_start = subscription.current_period_start
             
-            # Create new usage metric for current billing period
             # Calculate period end based on billing period
             # Use subscription's current_period_end if available, otherwise calculate
             if subscription.current_period_end:
                 period_end = subscription.current_period_end
             elif subscription.billing_period == BillingPeriod.MONTHLY:
                 # Monthly: add 1 month to period start
-                # Handle month-end edge cases properly
-                if current_period_start.month == 12:
-                    period_end = current_period_start.replace(year=current_period_start.year + 1, month=1, day=1) - timedelta(seconds=1)
-                else:
-                    # Try to add 1 month, handling day overflow (e.g., Jan 31 -> Feb 28/29)
-                    try:
-                        period_end = current_period_start.replace(month=current_period_start.month + 1) - timedelta(seconds=1)
-                    except ValueError:
-                        # Day doesn't exist in next month (e.g., Jan 31 -> Feb), use last day of next month
-                        next_month = current_period_start.replace(month=current_period_start.month + 1, day=1)
-                        period_end = (next_month + timedelta(days=32)).replace(day=1) - timedelta(seconds=1)
+                # (relativedelta clamps day overflow, e.g. Jan 31 -> Feb 28/29)
+                period_end = current_period_start + relativedelta(months=1) - timedelta(seconds=1)
             else:  # YEARLY
-                # Yearly: add 1 year to period start
-                try:
-                    period_end = current_period_start.replace(year=current_period_start.year + 1) - timedelta(seconds=1)
-                except ValueError:
-                    # Handle leap year edge case (Feb 29)
-                    period_end = current_period_start.replace(year=current_period_start.year + 1, month=2, day=28)
-            
-            # Check if metric for current period already exists
-            existing_metric = db.query(UsageMetric).filter(
-                and_(
-                    UsageMetric.user_id == subscription.user_id,
-                    UsageMetric.subscription_id == subscription.id,
-                    UsageMetric.metric_type == "keyword_searches_created_per_month",
-                    UsageMetric.period_start == current_period_start
-                )
-            ).first()
-            
-            if not existing_metric:
-                new_metric = UsageMetric(
-                    user_id=subscription.user_id,
-                    subscription_id=subscription.id,
-                    metric_type="keyword_searches_created_per_month",
-                    count=0,
-                    period_start=current_period_start,
-                    period_end=period_end
-                )
-                db.add(new_metric)
-                reset_count += 1
+                # Yearly: add 1 year to period start (Feb 29 -> Feb 28)
+                period_end = current_period_start + relativedelta(years=1) - timedelta(seconds=1)
             
-            # 2. Permanently delete soft-deleted searches from previous billing period
-            # These searches no longer count toward the limit after renewal
-            previous_period_deleted = db.query(KeywordSearch).filter(
+            new_metrics.append({
+                "user_id": subscription.user_id,
+                "subscription_id": subscription.id,
+                "metric_type": metric_type,
+                "count": 0,
+                "period_start": current_period_start,
+                "period_end": period_end,
+            })
+        
+        reset_count += db.execute(
+            upsert_insert(db)(UsageMetric).values(new_metrics).on_conflict_do_nothing(
+                index_elements=[UsageMetric.user_id, UsageMetric.metric_type, UsageMetric.period_start]
+            )
+        ).rowcount
+        
+        # 2. Permanently delete soft-deleted searches from previous billing period
+        # These searches no longer count toward the limit after renewal
+        previous_period_deleted = db.query(KeywordSearch).filter(
+            KeywordSearch.deleted_at.isnot(None),  # type: ignore
+            or_(*(
                 and_(
                     KeywordSearch.user_id == subscription.user_id,
-                    KeywordSearch.deleted_at.isnot(None),  # type: ignore
-                    KeywordSearch.deleted_at < current_period_start  # Deleted before current period
+                    KeywordSearch.deleted_at < subscription.current_period_start  # Deleted before current period
                 )
-            ).all()
-            
-            for search in previous_period_deleted:
-                db.delete(search)
-                deleted_count += 1
-            
-            db.commit()
-            
-            logger.info(
-                f"Reset keyword search limits for subscription {subscription.id} "
-                f"(user {subscription.user_id}): "
-                f"reset {reset_count} metrics, deleted {deleted_count} old soft-deleted searches"
-            )
-            
-            return {
-                "status": "success",
-                "reset_metrics": reset_count,
-                "deleted_searches": deleted_count
-            }
-            
-        except Exception as e:
-            logger.error(
-                f"Error resetting keyword search limits for subscription {subscription.id}: {str(e)}",
-                exc_info=True
+                for subscription in subscriptions
+            ))
+        )
+        
+        # Bulk DELETE bypasses the ORM cascade, so remove the searches'
+        # opportunities first (KeywordSearch.opportunities is delete-orphan)
+        db.query(Opportunity).filter(
+            Opportunity.keyword_search_id.in_(
+                previous_period_deleted.with_entities(KeywordSearch.id).scalar_subquery()
             )
-            return {
-                "status": "error",
-                "message": str(e),
-                "reset_metrics": reset_count,
-                "deleted_searches": deleted_count
-            }
+        ).delete(synchronize_session=False)
+        deleted_count = previous_period_deleted.delete(synchronize_session=False)
+        
+        logger.info(
+            f"Reset keyword search limits for {len(subscriptions)} subscription(s) "
+            f"({', '.join(s.id for s in subscriptions)}): "
+            f"reset {reset_count} metrics, deleted {deleted_count} old soft-deleted searches"
+        )
+        
+        return {
+            "status": "success",
+            "reset_metrics": reset_count,
+            "deleted_searches": deleted_count
+        }
     
     @staticmethod
     def refresh_usage_metrics(db: Session) -> Dict[str, Any]:
@@ -527,80 +720,86 @@ class SubscriptionManagementService:
         Returns:
             Dict with refresh results
         """
-        now = datetime.utcnow()
-        current_period_start = now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+        current_period_start, period_end = current_month_bounds()
         
-        # Get all active subscriptions
-        active_subscriptions = db.query(Subscription).filter(
-            Subscription.status == SubscriptionStatus.ACTIVE
-        ).all()
+        # Ensure current period usage metrics exist for all metric types
+        metric_types = MONTHLY_METRIC_TYPES
         
-        refreshed_count = 0
-        created_count = 0
-        cleaned_count = 0
-        errors = []
+        # Active subscriptions (only the columns needed are selected below)
+        active_query = db.query(Subscription).filter(
+            Subscription.status == SubscriptionStatus.ACTIVE
+        )
         
-        for subscription in active_subscriptions:
-            try:
-                # Clean up expired usage metrics from previous periods
-                expired_metrics = db.query(UsageMetric).filter(
-                    and_(
-                        UsageMetric.subscription_id == subscription.id,
-                        UsageMetric.period_start < current_period_start
+        try:
+            # Clean up expired usage metrics from previous periods in one DELETE
+            cleaned_count = db.query(UsageMetric).filter(
+                and_(
+                    UsageMetric.subscription_id.in_(
+                        active_query.with_entities(Subscription.id).scalar_subquery()
+                    ),
+                    UsageMetric.period_start < current_period_start
+                )
+            ).delete(synchronize_session=False)
+            
+            # Create missing current period metrics with INSERT ... ON CONFLICT DO NOTHING
+            # on uq_usage_metric_user_type_period: no existence check, and safe
+            # if another run (or UsageService) creates the same metric concurrently
+            insert_stmt = upsert_insert(db)(UsageMetric)
+            
+            def insert_missing(rows: List[Dict[str, Any]]) -> int:
+                return db.execute(
+                    insert_stmt.values(rows).on_conflict_do_nothing(
+                        index_elements=[UsageMetric.user_id, UsageMetric.metric_type, UsageMetric.period_start]
                     )
-                ).all()
-                
-                for metric in expired_metrics:
-                    db.delete(metric)
-                    cleaned_count += 1
-                
-                # Ensure current period usage metrics exist for all metric types
-                metric_types = [
-                    "opportunities_per_month",
-                    "api_calls_per_month",
-                    "keyword_searches_created_per_month"
-                ]
-                
-                for metric_type in metric_types:
-                    # Check if current period metric exists
-                    existing_metric = db.query(UsageMetric).filter(
-                        and_(
-                            UsageMetric.user_id == subscription.user_id,
-                            UsageMetric.subscription_id == subscription.id,
-                            UsageMetric.metric_type == metric_type,
-                            UsageMetric.period_start == current_period_start
-                        )
-                    ).first()
-                    
-                    if not existing_metric:
-                        # Create new usage metric for current period
-                        period_end = (current_period_start + timedelta(days=32)).replace(day=1) - timedelta(seconds=1)
-                        usage_metric = UsageMetric(
-                            user_id=subscription.user_id,
-                            subscription_id=subscription.id,
-                            metric_type=metric_type,
-                            count=0,
-                            period_start=current_period_start,
-                            period_end=period_end
-                        )
-                        db.add(usage_metric)
-                        created_count += 1
-                
+                ).rowcount
+            
+            created_count = 0
+            refreshed_count = 0
+            seen_user_ids = set()
+            rows = []
+            # Stream (id, user_id) rows instead of materializing every subscription
+            for subscription_id, user_id in active_query.with_entities(
+                Subscription.id, Subscription.user_id
+            ).yield_per(SUBSCRIPTION_SCAN_BATCH_SIZE):
                 refreshed_count += 1
-                
-            except Exception as e:
-                error_msg = f"Error refreshing usage metrics for subscription {subscription.id}: {str(e)}"
-                logger.error(error_msg, exc_info=True)
-                errors.append(error_msg)
-        
-        db.commit()
+                if user_id in seen_user_ids:
+                    continue
+                seen_user_ids.add(user_id)
+                for metric_type in metric_types:
+                    rows.append({
+                        "user_id": user_id,
+                        "subscription_id": subscription_id,
+                        "metric_type": metric_type,
+                        "count": 0,
+                        "period_start": current_period_start,
+                        "period_end": period_end,
+                    })
+                if len(rows) >= SUBSCRIPTION_SCAN_BATCH_SIZE:
+                    created_count += insert_missing(rows)
+                    rows = []
+            if rows:
+                created_count += insert_missing(rows)
+            
+            db.commit()
+            
+        except Exception as e:
+            db.rollback()
+            logger.error(f"Error in refresh_usage_metrics: {str(e)}", exc_info=True)
+            return {
+                "status": "error",
+                "message": str(e),
+                "refreshed_count": 0,
+                "created_count": 0,
+                "cleaned_count": 0,
+                "errors": [str(e)]
+            }
         
         return {
             "status": "success",
             "refreshed_count": refreshed_count,
             "created_count": created_count,
             "cleaned_count": cleaned_count,
-            "errors": errors
+            "errors": []
         }
     
     @staticmethod
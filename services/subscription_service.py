@@ -9,8 +9,10 @@ Handles subscription management business logic:
 - Upgrade/downgrade subscriptions with proration
 """
 
-from typing import Optional
+from types import MappingProxyType
+from typing import Optional, Mapping, Union
 from datetime import datetime, timedelta
+from sqlalchemy import func, or_, select
 from sqlalchemy.orm import Session
 from fastapi import HTTPException, status
 
@@ -18,12 +20,77 @@ from models.user import User
 from models.subscription import Subscription, SubscriptionStatus, SubscriptionPlan
 from models.price import BillingPeriod
 from models.keyword_search import KeywordSearch
-from models.usage_metric import UsageMetric
+from models.usage_metric import UsageMetric, MONTHLY_METRIC_TYPES
 from services.price_service import PriceService
+from core.database import upsert_insert
+from services.billing_periods import current_month_bounds
+from services.usage_cache import usage_cache_key, get_cached_usage_counts, cache_usage_counts
 from core.config import get_settings
 
 settings = get_settings()
 
+# Read-only view of the configured plan limits, built once at import.
+# get_plan_limits() runs on every usage check, and handing out the shared
+# settings dicts would let a caller mutate limits for the whole process.
+# Keyed by plan name and by SubscriptionPlan member, so callers holding a
+# loaded subscription can look up subscription.plan without .value.
+_PLAN_LIMITS_BY_NAME = {
+    plan: MappingProxyType(dict(limits))
+    for plan, limits in settings.PLAN_LIMITS.items()
+}
+_PLAN_LIMITS = MappingProxyType({
+    **_PLAN_LIMITS_BY_NAME,
+    **{
+        plan: _PLAN_LIMITS_BY_NAME[plan.value]
+        for plan in SubscriptionPlan
+        if plan.value in _PLAN_LIMITS_BY_NAME
+    },
+})
+
+
+def _active_subscription_query(user_id: str, db: Session):
+    """Query for a user's active subscription, skipping expired free tier ones."""
+    return db.query(Subscription).filter(
+        Subscription.user_id == user_id,
+        Subscription.status == SubscriptionStatus.ACTIVE,
+        # Skip free tier subscriptions that have expired (1 month)
+        or_(
+            Subscription.plan != SubscriptionPlan.FREE,
+            Subscription.current_period_end.is_(None),
+            Subscription.current_period_end >= datetime.utcnow()
+        )
+    )
+
+
+def _seed_usage_metrics(subscription: Subscription, db: Session) -> None:
+    """
+    Insert zero-count usage metrics for the current month.
+    
+    Run when a subscription is created so the first usage check of the month
+    finds its rows instead of creating them. Rows the user already has for
+    this month (e.g. from a previous subscription) are left as they are.
+    
+    Args:
+        subscription: Newly created (flushed) subscription
+        db: Database session
+    """
+    period_start, period_end = current_month_bounds()
+    db.execute(
+        upsert_insert(db)(UsageMetric).values([
+            {
+                "user_id": subscription.user_id,
+                "subscription_id": subscription.id,
+                "metric_type": metric_type,
+                "count": 0,
+                "period_start": period_start,
+                "period_end": period_end,
+            }
+            for metric_type in MONTHLY_METRIC_TYPES
+        ]).on_conflict_do_nothing(
+            index_elements=[UsageMetric.user_id, UsageMetric.metric_type, UsageMetric.period_start]
+        )
+    )
+
 
 class SubscriptionService:
     """Service for handling subscription operations."""
@@ -33,7 +100,9 @@ class SubscriptionService:
         """
         Get user's active subscription.
         
-        For free tier, checks if 1 month has passed and expires if needed.
+        Free tier subscriptions past their 1-month period are not returned.
+        They are marked EXPIRED by the daily process_expired_subscriptions job,
+        so this read never writes.
         
         Args:
             user_id: User UUID
@@ -42,23 +111,24 @@ class SubscriptionService:
         Returns:
             Subscription: Active subscription if found, None otherwise
         """
-        subscription = db.query(Subscription).filter(
-            Subscription.user_id == user_id,
-            Subscription.status == SubscriptionStatus.ACTIVE
-        ).first()
-        
-        if not subscription:
-            return None
+        return _active_subscription_query(user_id, db).first()
+    
+    @staticmethod
+    def has_active_subscription(user_id: str, db: Session) -> bool:
+        """
+        Check whether user has an active subscription.
         
-        # Check if free tier has expired (1 month)
-        if subscription.plan == SubscriptionPlan.FREE:
-            if subscription.current_period_end and subscription.current_period_end < datetime.utcnow():
-                # Free tier expired, mark as expired
-                subscription.status = SubscriptionStatus.EXPIRED
-                db.commit()
-                return None
+        Same rules as get_active_subscription, but runs SELECT EXISTS(...)
+        instead of loading the row.
         
-        return subscription
+        Args:
+            user_id: User UUID
+            db: Database session
+            
+        Returns:
+            bool: True if user has an active subscription
+        """
+        return db.query(_active_subscription_query(user_id, db).exists()).scalar()
     
     @staticmethod
     def get_subscription_by_id(subscription_id: str, user_id: str, db: Session) -> Optional[Subscription]:
@@ -79,20 +149,20 @@ class SubscriptionService:
         ).first()
     
     @staticmethod
-    def get_plan_limits(plan: str) -> dict:
+    def get_plan_limits(plan: Union[str, SubscriptionPlan]) -> Mapping[str, int]:
         """
         Get plan limits from configuration.
         
         Args:
-            plan: Plan name (starter, professional, power)
+            plan: Plan name (starter, professional, power) or SubscriptionPlan member
             
         Returns:
-            dict: Plan limits
+            Mapping: Plan limits (read-only)
             
         Raises:
             ValueError: If plan not found
         """
-        limits = settings.PLAN_LIMITS.get(plan)
+        limits = _PLAN_LIMITS.get(plan)
         if limits is None:
             raise ValueError(f"Unknown plan: {plan}")
         return limits
@@ -101,7 +171,8 @@ class SubscriptionService:
     def check_usage_limit(
         user_id: str,
         metric_type: str,
-        db: Session
+        db: Session,
+        subscription: Optional[Subscription] = None
     ) -> tuple[bool, int, int]:
         """
         Check if user has reached usage limit for a metric.
@@ -115,6 +186,7 @@ class SubscriptionService:
             user_id: User UUID
             metric_type: Type of metric (keyword_searches, opportunities_per_month, api_calls_per_month)
             db: Database session
+            subscription: User's active subscription, if the caller already loaded it
             
         Returns:
             tuple: (allowed, current_count, limit)
@@ -122,78 +194,124 @@ class SubscriptionService:
                 - current_count: Current usage count
                 - limit: Plan limit for this metric
         """
+        return SubscriptionService.check_usage_limits(
+            user_id, [metric_type], db, subscription=subscription
+        )[metric_type]
+    
+    @staticmethod
+    def check_usage_limits(
+        user_id: str,
+        metric_types: list[str],
+        db: Session,
+        subscription: Optional[Subscription] = None
+    ) -> dict[str, tuple[bool, int, int]]:
+        """
+        Check usage limits for several metrics at once.
+        
+        Loads the active subscription once and reads all monthly counters in a
+        single query, plus one count for keyword_searches if requested.
+        
+        Args:
+            user_id: User UUID
+            metric_types: Metric types to check (see check_usage_limit)
+            db: Database session
+            subscription: User's active subscription, if the caller already loaded
+                it (e.g. the require_active_subscription dependency); skips the lookup
+            
+        Returns:
+            dict: (allowed, current_count, limit) tuple keyed by metric type
+        """
         # Get active subscription
-        subscription = SubscriptionService.get_active_subscription(user_id, db)
+        if subscription is None:
+            subscription = SubscriptionService.get_active_subscription(user_id, db)
         if not subscription:
-            return (False, 0, 0)  # No subscription = no access
+            # No subscription = no access
+            return {metric_type: (False, 0, 0) for metric_type in metric_types}
         
         # Get plan limits
-        plan_limits = SubscriptionService.get_plan_limits(subscription.plan.value)
-        limit = plan_limits.get(metric_type, 0)
+        plan_limits = SubscriptionService.get_plan_limits(subscription.plan)
         
         # Free tier is now limited to power user limits (10/500), so no special handling needed
         # Limits are enforced normally like other plans
         
-        if metric_type == "keyword_searches":
+        month_start, _ = current_month_bounds()
+        # Use subscription's billing period start, falling back to calendar month
+        # if the subscription has no period start
+        billing_period_start = subscription.current_period_start or month_start
+        
+        # Monthly counters come from usage metrics. The creation limit is tracked
+        # per billing period, everything else per calendar month.
+        metric_periods = {
+            metric_type: billing_period_start if metric_type == "keyword_searches_created_per_month" else month_start
+            for metric_type in metric_types
+            if metric_type != "keyword_searches"
+        }
+        
+        # Serve counters from the Redis usage cache where possible
+        cache_keys = {
+            metric_type: usage_cache_key(user_id, metric_type, period_start)
+            for metric_type, period_start in metric_periods.items()
+        }
+        current_counts = get_cached_usage_counts(cache_keys, db)
+        missing_periods = {
+            metric_type: period_start
+            for metric_type, period_start in metric_periods.items()
+            if metric_type not in current_counts
+        }
+        
+        # Everything else is read in one round-trip: one scalar subquery per count
+        counts_query = {}
+        
+        if "keyword_searches" in metric_types:
             # CONCURRENT limit - count active + soft-deleted searches in current billing period
             # This prevents abuse: deleted searches still count until billing period ends
-            now = datetime.utcnow()
-            
-            # Use subscription's billing period start, not calendar month
-            if subscription.current_period_start:
-                period_start = subscription.current_period_start
-            else:
-                # Fallback to calendar month if subscription has no period start
-                period_start = now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
-            
-            # Count: active searches OR soft-deleted searches from current billing period
-            current_count = db.query(KeywordSearch).filter(
+            # The two sets are disjoint, so they are counted separately (each
+            # subquery can use its own partial index) and summed.
+            counts_query["active_searches"] = select(func.count(KeywordSearch.id)).where(
                 KeywordSearch.user_id == user_id,
-                # Active searches
-                (
-                    (KeywordSearch.enabled == True) & (KeywordSearch.deleted_at.is_(None))  # type: ignore
-                ) | (
-                    # OR soft-deleted searches from current billing period (still count toward limit)
-                    (KeywordSearch.deleted_at.isnot(None)) &  # type: ignore
-                    (KeywordSearch.deleted_at >= period_start)  # type: ignore
-                )
-            ).count()
-        elif metric_type == "keyword_searches_created_per_month":
-            # MONTHLY creation limit - track total searches created in current billing period
-            # Use subscription's billing period, not calendar month
-            if subscription.current_period_start:
-                period_start = subscription.current_period_start
-            else:
-                # Fallback to calendar month if subscription has no period start
-                now = datetime.utcnow()
-                period_start = now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
-            
-            usage_metric = db.query(UsageMetric).filter(
+                KeywordSearch.enabled == True,  # type: ignore  # matches the partial index predicate
+                KeywordSearch.deleted_at.is_(None)  # type: ignore
+            ).scalar_subquery()
+            # Soft-deleted searches from current billing period (still count toward limit)
+            counts_query["deleted_searches"] = select(func.count(KeywordSearch.id)).where(
+                KeywordSearch.user_id == user_id,
+                KeywordSearch.deleted_at >= billing_period_start  # type: ignore
+            ).scalar_subquery()
+        
+        # Counters are unique per user, type and period (uq_usage_metric_user_type_period),
+        # so they are not filtered by subscription: a plan change mid-month keeps them
+        for metric_type, period_start in missing_periods.items():
+            counts_query[metric_type] = select(UsageMetric.count).where(
                 UsageMetric.user_id == user_id,
-                UsageMetric.subscription_id == subscription.id,
                 UsageMetric.metric_type == metric_type,
                 UsageMetric.period_start == period_start
-            ).first()
+            ).scalar_subquery()
+        
+        if counts_query:
+            row = db.execute(
+                select(*(query.label(name) for name, query in counts_query.items()))
+            ).one()._mapping
             
-            current_count = usage_metric.count if usage_metric else 0
-        else:
-            # MONTHLY limit - get from usage metrics
-            # Get current period (monthly)
-            now = datetime.utcnow()
-            period_start = now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
-            period_end = (period_start + timedelta(days=32)).replace(day=1) - timedelta(seconds=1)
+            if "keyword_searches" in metric_types:
+                current_counts["keyword_searches"] = row["active_searches"] + row["deleted_searches"]
             
-            usage_metric = db.query(UsageMetric).filter(
-                UsageMetric.user_id == user_id,
-                UsageMetric.subscription_id == subscription.id,
-                UsageMetric.metric_type == metric_type,
-                UsageMetric.period_start == period_start
-            ).first()
-            
-            current_count = usage_metric.count if usage_metric else 0
-        
-        allowed = current_count < limit
-        return (allowed, current_count, limit)
+            loaded_counts = {
+                metric_type: row[metric_type] or 0
+                for metric_type in missing_periods
+            }
+            current_counts.update(loaded_counts)
+            cache_usage_counts({
+                cache_keys[metric_type]: count
+                for metric_type, count in loaded_counts.items()
+            })
+        
+        results = {}
+        for metric_type in metric_types:
+            limit = plan_limits.get(metric_type, 0)
+            current_count = current_counts.get(metric_type, 0)
+            results[metric_type] = (current_count < limit, current_count, limit)
+        
+        return results
     
     @staticmethod
     def create_subscription(
@@ -228,10 +346,9 @@ class SubscriptionService:
         
         # For free plan, allow creating even if user has active subscription
         # (they might be upgrading from free to paid, or re-creating free)
-        if plan_enum != SubscriptionPlan.FREE:
+        if plan_enum is not SubscriptionPlan.FREE:
             # Check if user already has active subscription (for paid plans)
-            existing = SubscriptionService.get_active_subscription(user_id, db)
-            if existing:
+            if SubscriptionService.has_active_subscription(user_id, db):
                 raise HTTPException(
                     status_code=status.HTTP_400_BAD_REQUEST,
                     detail="User already has an active subscription"
@@ -253,12 +370,11 @@ class SubscriptionService:
         now = datetime.utcnow()
         
         # For free plan, set 1-month period (30 days)
-        if plan_enum == SubscriptionPlan.FREE:
+        if plan_enum is SubscriptionPlan.FREE:
             period_start = now
             period_end = now + timedelta(days=30)  # 1 month
-        elif billing_period_enum == BillingPeriod.MONTHLY:
-            period_start = now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
-            period_end = (period_start + timedelta(days=32)).replace(day=1) - timedelta(seconds=1)
+        elif billing_period_enum is BillingPeriod.MONTHLY:
+            period_start, period_end = current_month_bounds(now)
         else:  # YEARLY
             period_start = now.replace(month=1, day=1, hour=0, minute=0, second=0, microsecond=0)
             period_end = period_start.replace(year=period_start.year + 1) - timedelta(seconds=1)
@@ -277,8 +393,9 @@ class SubscriptionService:
         )
         
         db.add(subscription)
+        db.flush()  # Get subscription ID
+        _seed_usage_metrics(subscription, db)
         db.commit()
-        db.refresh(subscription)
         
         return subscription
     
@@ -328,8 +445,9 @@ class SubscriptionService:
         )
         
         db.add(subscription)
+        db.flush()  # Get subscription ID
+        _seed_usage_metrics(subscription, db)
         db.commit()
-        db.refresh(subscription)
         
         return subscription
     
@@ -372,7 +490,6 @@ class SubscriptionService:
             subscription.cancel_at_period_end = False  # Fixed: Now Boolean
         
         db.commit()
-        db.refresh(subscription)
         
         return subscription
     
@@ -5,8 +5,9 @@ Handles support thread and message operations.
 """
 
 from typing import List, Optional
-from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import desc
+from sqlalchemy.orm import Session, selectinload
+from sqlalchemy import desc, func
+from fastapi import BackgroundTasks
 
 from models.support_thread import SupportThread, ThreadStatus
 from models.support_message import SupportMessage, MessageSender
@@ -50,29 +51,35 @@ class SupportService:
         Returns:
             Support thread or None if not found
         """
-        # Eagerly load messages to ensure all messages are loaded
-        thread = db.query(SupportThread).options(
-            joinedload(SupportThread.messages)
+        # Mark support messages as read when user views thread, in one UPDATE.
+        # The thread filter keeps this scoped to the user's own thread.
+        db.query(SupportMessage).filter(
+            SupportMessage.thread_id.in_(
+                db.query(SupportThread.id).filter(
+                    SupportThread.id == thread_id,
+                    SupportThread.user_id == user_id
+                )
+            ),
+            SupportMessage.sender == MessageSender.SUPPORT,
+            SupportMessage.read == False
+        ).update({SupportMessage.read: True}, synchronize_session=False)
+        db.commit()
+        
+        # Eagerly load messages (after the commit, so they are not expired)
+        return db.query(SupportThread).options(
+            selectinload(SupportThread.messages)
         ).filter(
             SupportThread.id == thread_id,
             SupportThread.user_id == user_id
         ).first()
-        
-        if thread:
-            # Mark support messages as read when user views thread
-            for message in thread.messages:
-                if message.sender == MessageSender.SUPPORT and not message.read:
-                    message.read = True
-            db.commit()
-        
-        return thread
     
     @staticmethod
     def create_thread(
         user_id: str,
         subject: str,
         message: str,
-        db: Session
+        db: Session,
+        background_tasks: Optional[BackgroundTasks] = None
     ) -> SupportThread:
         """
         Create a new support thread with initial message.
@@ -82,6 +89,8 @@ class SupportService:
             subject: Thread subject
             message: Initial message content
             db: Database session
+            background_tasks: If given, the notification email is sent after
+                the response instead of inline
             
         Returns:
             Created support thread
@@ -102,6 +111,7 @@ class SupportService:
         # Create initial message
         initial_message = SupportMessage(
             thread_id=thread.id,
+            user_id=user_id,
             content=sanitized_message,
             sender=MessageSender.USER,
             read=True  # User's own message is read
@@ -111,18 +121,28 @@ class SupportService:
         db.refresh(thread)
         
         # Send email notification to user
-        try:
-            user = db.query(User).filter(User.id == user_id).first()
-            if user:
-                EmailService.send_support_thread_created_email(
+        user = db.get(User, user_id)  # Usually already in the session (current user)
+        if user:
+            if background_tasks is not None:
+                # Send asynchronously (non-blocking) so SMTP latency stays off the request
+                background_tasks.add_task(
+                    EmailService.send_support_thread_created_email,
                     user.email,
                     user.full_name,
                     thread.subject,
                     thread.id
                 )
-        except Exception as e:
-            # Log error but don't fail the request
-            logger.error(f"Failed to send support notification email: {str(e)}", exc_info=True)
+            else:
+                try:
+                    EmailService.send_support_thread_created_email(
+                        user.email,
+                        user.full_name,
+                        thread.subject,
+                        thread.id
+                    )
+                except Exception as e:
+                    # Log error but don't fail the request
+                    logger.error(f"Failed to send support notification email: {str(e)}", exc_info=True)
         
         return thread
     
@@ -164,6 +184,7 @@ class SupportService:
         # Create message
         message = SupportMessage(
             thread_id=thread_id,
+            user_id=user_id,
             content=sanitized_content,
             sender=MessageSender.USER,
             read=True  # User's own message is read
@@ -187,11 +208,9 @@ class SupportService:
         Returns:
             Count of unread messages
         """
-        count = db.query(SupportMessage).join(SupportThread).filter(
-            SupportThread.user_id == user_id,
+        return db.query(func.count(SupportMessage.id)).filter(
+            SupportMessage.user_id == user_id,
             SupportMessage.sender == MessageSender.SUPPORT,
             SupportMessage.read == False
-        ).count()
-        
-        return count
+        ).scalar()
 
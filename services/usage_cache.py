@@ -0,0 +1,129 @@
+"""
+Usage Cache
+
+Short-lived Redis cache of monthly usage counters for limit checks.
+
+SubscriptionService.check_usage_limits reads counters from here before
+querying usage_metrics. UsageService.increment_usage marks the counter it
+changed on the session, and the key is deleted once that transaction
+commits, so the next check reloads it from the database. Without Redis
+every check goes to the database, as before.
+"""
+
+from datetime import datetime
+from typing import Dict
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from core.logger import get_logger
+from core.redis_client import get_redis_client
+
+logger = get_logger(__name__)
+
+# Usage counter key prefix in Redis
+USAGE_KEY_PREFIX = "usage:"
+# Upper bound on how long a cached counter can lag a write that raced its load
+USAGE_TTL_SECONDS = 300
+
+_USAGE_KEYS_CHANGED = "usage_cache_keys_changed"
+
+
+def usage_cache_key(user_id: str, metric_type: str, period_start: datetime) -> str:
+    """
+    Redis key for one usage counter in one period.
+    
+    Keyed like uq_usage_metric_user_type_period: counters belong to the user,
+    not the subscription, so they carry over a mid-month plan change.
+    """
+    return f"{USAGE_KEY_PREFIX}{user_id}:{metric_type}:{period_start:%Y%m%d%H%M%S}"
+
+
+def get_cached_usage_counts(keys: Dict[str, str], db: Session) -> Dict[str, int]:
+    """
+    Read cached usage counters.
+
+    Counters changed in the session's open transaction are skipped, so a
+    check after an uncommitted increment still sees it in the database.
+
+    Args:
+        keys: Redis key by metric type
+        db: Database session
+
+    Returns:
+        dict: Cached count by metric type (missing counters are omitted)
+    """
+    redis_client = get_redis_client()
+    if redis_client is None:
+        return {}
+
+    changed = db.info.get(_USAGE_KEYS_CHANGED, ())
+    metric_types = [metric_type for metric_type, key in keys.items() if key not in changed]
+    if not metric_types:
+        return {}
+
+    try:
+        values = redis_client.mget([keys[metric_type] for metric_type in metric_types])
+    except Exception as e:
+        logger.warning(f"Failed to read usage counters from Redis: {str(e)}")
+        return {}
+
+    return {
+        metric_type: int(value)
+        for metric_type, value in zip(metric_types, values)
+        if value is not None
+    }
+
+
+def cache_usage_counts(counts: Dict[str, int]) -> None:
+    """
+    Cache usage counters loaded from the database.
+
+    Args:
+        counts: Count by Redis key
+    """
+    redis_client = get_redis_client()
+    if redis_client is None or not counts:
+        return
+
+    try:
+        pipeline = redis_client.pipeline(transaction=False)
+        for key, count in counts.items():
+            pipeline.setex(key, USAGE_TTL_SECONDS, count)
+        pipeline.execute()
+    except Exception as e:
+        logger.warning(f"Failed to cache usage counters in Redis: {str(e)}")
+
+
+def mark_usage_changed(key: str, db: Session) -> None:
+    """
+    Invalidate a cached usage counter when the session's transaction commits.
+
+    Args:
+        key: Redis key of the changed counter
+        db: Database session that wrote the change
+    """
+    db.info.setdefault(_USAGE_KEYS_CHANGED, set()).add(key)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_changed_usage(session: Session) -> None:
+    """Delete cached counters written by the transaction that just committed."""
+    keys = session.info.pop(_USAGE_KEYS_CHANGED, None)
+    if not keys:
+        return
+
+    redis_client = get_redis_client()
+    if redis_client is None:
+        return
+
+    try:
+        redis_client.delete(*keys)
+    except Exception as e:
+        logger.warning(f"Failed to invalidate usage counters in Redis: {str(e)}")
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_changed_usage(session: Session) -> None:
+    """Forget counters marked by a transaction that was rolled back."""
+    session.info.pop(_USAGE_KEYS_CHANGED, None)
@@ -9,14 +9,17 @@ Handles usage tracking business logic:
 """
 
 from typing import Optional
-from datetime import datetime, timedelta
+from datetime import datetime
 from sqlalchemy.orm import Session
 from fastapi import HTTPException, status
 
+from core.database import upsert_insert
 from models.user import User
 from models.subscription import Subscription
 from models.usage_metric import UsageMetric
 from services.subscription_service import SubscriptionService
+from services.billing_periods import current_month_bounds
+from services.usage_cache import usage_cache_key, mark_usage_changed
 
 
 class UsageService:
@@ -41,32 +44,35 @@ class UsageService:
         Returns:
             UsageMetric: Current usage metric
         """
-        # Get current period (monthly)
-        now = datetime.utcnow()
-        period_start = now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
-        period_end = (period_start + timedelta(days=32)).replace(day=1) - timedelta(seconds=1)
+        period_start, period_end = current_month_bounds()
         
-        # Get or create usage metric
-        usage_metric = db.query(UsageMetric).filter(
+        # Looked up by uq_usage_metric_user_type_period (one row per user, type and period)
+        query = db.query(UsageMetric).filter(
             UsageMetric.user_id == user_id,
-            UsageMetric.subscription_id == subscription_id,
             UsageMetric.metric_type == metric_type,
             UsageMetric.period_start == period_start
-        ).first()
+        )
+        
+        # Rows are seeded when the subscription is created and by the daily
+        # refresh_usage_metrics job, so this is normally a single SELECT
+        usage_metric = query.first()
         
         if not usage_metric:
-            # Create new usage metric for this period
-            usage_metric = UsageMetric(
-                user_id=user_id,
-                subscription_id=subscription_id,
-                metric_type=metric_type,
-                count=0,
-                period_start=period_start,
-                period_end=period_end
+            # Create new usage metric for this period (safe if created concurrently)
+            db.execute(
+                upsert_insert(db)(UsageMetric).values(
+                    user_id=user_id,
+                    subscription_id=subscription_id,
+                    metric_type=metric_type,
+                    count=0,
+                    period_start=period_start,
+                    period_end=period_end
+                ).on_conflict_do_nothing(
+                    index_elements=[UsageMetric.user_id, UsageMetric.metric_type, UsageMetric.period_start]
+                )
             )
-            db.add(usage_metric)
             db.commit()
-            db.refresh(usage_metric)
+            usage_metric = query.first()
         
         return usage_metric
     
@@ -76,26 +82,56 @@ class UsageService:
         subscription_id: str,
         metric_type: str,
         amount: int = 1,
-        db: Session = None
+        db: Session = None,
+        autocommit: bool = True
     ) -> UsageMetric:
         """
         Increment usage metric.
         
+        Runs as a single INSERT ... ON CONFLICT DO UPDATE so the counter is
+        created or incremented in one round-trip, and concurrent increments
+        are applied atomically by the database instead of read-modify-write.
+        
         Args:
             user_id: User UUID
             subscription_id: Subscription UUID
             metric_type: Type of metric (opportunities_per_month, api_calls_per_month)
             amount: Amount to increment (default: 1)
             db: Database session
+            autocommit: Commit after incrementing (default: True). Pass False to
+                leave the increment in the caller's transaction, so it is
+                committed together with the caller's own writes.
             
         Returns:
             UsageMetric: Updated usage metric
         """
-        usage_metric = UsageService.get_current_usage(user_id, subscription_id, metric_type, db)
-        
-        usage_metric.count += amount
-        db.commit()
-        db.refresh(usage_metric)
+        period_start, period_end = current_month_bounds()
+        
+        stmt = upsert_insert(db)(UsageMetric).values(
+            user_id=user_id,
+            subscription_id=subscription_id,
+            metric_type=metric_type,
+            count=amount,
+            period_start=period_start,
+            period_end=period_end
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[UsageMetric.user_id, UsageMetric.metric_type, UsageMetric.period_start],
+            set_={
+                "count": UsageMetric.count + amount,
+                "updated_at": datetime.utcnow(),
+            }
+        ).returning(UsageMetric)
+        
+        usage_metric = db.scalars(
+            stmt, execution_options={"populate_existing": True}
+        ).one()
+        # Cached counter is dropped once this transaction commits
+        mark_usage_changed(
+            usage_cache_key(user_id, metric_type, period_start), db
+        )
+        if autocommit:
+            db.commit()
         
         return usage_metric
     
@@ -125,19 +161,15 @@ class UsageService:
             return
         
         # Get current period (monthly)
-        now = datetime.utcnow()
-        current_period_start = now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+        current_period_start, _ = current_month_bounds()
         
         # Only reset/delete metrics from PREVIOUS periods
         # Current period metrics are handled automatically by get_current_usage()
-        expired_metrics = db.query(UsageMetric).filter(
+        # Delete expired metrics in one statement (or could archive to history table)
+        db.query(UsageMetric).filter(
             UsageMetric.subscription_id == subscription_id,
             UsageMetric.period_start < current_period_start
-        ).all()
-        
-        # Delete expired metrics (or could archive to history table)
-        for metric in expired_metrics:
-            db.delete(metric)
+        ).delete(synchronize_session=False)
         
         db.commit()
     
@@ -169,17 +201,16 @@ class UsageService:
                 detail="Subscription not found"
             )
         
-        # Get plan limits
-        plan_limits = SubscriptionService.get_plan_limits(subscription.plan.value)
+        # Get current usage for all metric types in one pass
+        usage_limits = SubscriptionService.check_usage_limits(
+            user_id,
+            ["keyword_searches", "keyword_searches_created_per_month", "opportunities_per_month", "api_calls_per_month"],
+            db
+        )
         
-        # Get current usage for each metric type
         usage_data = {}
         
-        for metric_type in ["keyword_searches", "keyword_searches_created_per_month", "opportunities_per_month", "api_calls_per_month"]:
-            allowed, current, limit = SubscriptionService.check_usage_limit(
-                user_id, metric_type, db
-            )
-            
+        for metric_type, (allowed, current, limit) in usage_limits.items():
             usage_data[metric_type] = {
                 "current": current,
                 "limit": limit,
@@ -6,22 +6,25 @@ Provides shared test fixtures for all tests.
 
 import pytest
 from fastapi.testclient import TestClient
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event, insert
 from sqlalchemy.orm import sessionmaker, Session
 from sqlalchemy.pool import StaticPool
-import os
-import sys
+from datetime import datetime, timedelta
 
-# Add parent directory to path
-sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-
-from api.main import app
-from core.database import Base, get_db
+from core.database import Base
 from models.user import User
 from models.subscription import Subscription, SubscriptionPlan, SubscriptionStatus
-from services.auth_service import AuthService
-from services.subscription_service import SubscriptionService
-from core.security import get_password_hash
+from models.price import BillingPeriod
+from services.price_service import PriceService
+from core.security import get_password_hash, pwd_context, create_access_token
+
+# Minimum bcrypt cost for tests; hashes record their own rounds, so
+# verification is unaffected
+pwd_context.update(bcrypt__rounds=4)
+
+# Hashed once: bcrypt is deliberately slow and every test user shares it
+TEST_PASSWORD = "TestPassword123!"
+TEST_PASSWORD_HASH = get_password_hash(TEST_PASSWORD)
 
 # Use in-memory SQLite for testing
 SQLALCHEMY_DATABASE_URL = "sqlite:///:memory:"
@@ -32,24 +35,81 @@ engine = create_engine(
     poolclass=StaticPool,
 )
 
-TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False)
 
 
-@pytest.fixture(scope="function")
-def db():
-    """Create a fresh database for each test."""
+# pysqlite emits its own BEGIN/COMMIT, which breaks SAVEPOINTs; let SQLAlchemy
+# control transactions instead. The database is throwaway and used by one
+# process, so skip syncing and keep journal and temp data in memory.
+@event.listens_for(engine, "connect")
+def _sqlite_connect(dbapi_connection, connection_record):
+    dbapi_connection.isolation_level = None
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA synchronous=OFF")
+    cursor.execute("PRAGMA journal_mode=MEMORY")
+    cursor.execute("PRAGMA temp_store=MEMORY")
+    cursor.execute("PRAGMA locking_mode=EXCLUSIVE")
+    cursor.close()
+
+
+@event.listens_for(engine, "begin")
+def _sqlite_begin(conn):
+    conn.exec_driver_sql("BEGIN")
+
+
+@pytest.fixture(scope="session")
+def _connection():
+    """Create the schema once and hold one connection in an outer transaction."""
     Base.metadata.create_all(bind=engine)
-    db = TestingSessionLocal()
+    connection = engine.connect()
+    transaction = connection.begin()
+    try:
+        yield connection
+    finally:
+        transaction.rollback()
+        connection.close()
+        Base.metadata.drop_all(bind=engine)
+
+
+@pytest.fixture(scope="function")
+def db(_connection):
+    """
+    Database session for one test, rolled back afterwards.
+    
+    The test runs inside a SAVEPOINT on the shared connection. Commits made by
+    the code under test only release nested savepoints, so rolling back the
+    test's savepoint leaves the database as it was before the test.
+    """
+    PriceService.invalidate_cache()  # Cached prices must not leak between tests
+    savepoint = _connection.begin_nested()
+    db = TestingSessionLocal(bind=_connection, join_transaction_mode="create_savepoint")
     try:
         yield db
     finally:
         db.close()
-        Base.metadata.drop_all(bind=engine)
+        savepoint.rollback()
+
+
+@pytest.fixture(scope="session")
+def _client():
+    """
+    Start the app once for the whole test session.
+    
+    The app is imported here rather than at module level so collection and
+    tests that never make requests skip building it.
+    """
+    from api.main import app
+    
+    with TestClient(app) as test_client:
+        yield test_client
 
 
 @pytest.fixture(scope="function")
-def client(db: Session):
+def client(_client: TestClient, db: Session):
     """Create a test client with database override."""
+    from api.main import app
+    from core.database import get_db
+    
     def override_get_db():
         try:
             yield db
@@ -57,51 +117,65 @@ def client(db: Session):
             pass
     
     app.dependency_overrides[get_db] = override_get_db
+    try:
+        yield _client
+    finally:
+        # Only drop this fixture's override; others may be set by the test
+        app.dependency_overrides.pop(get_db, None)
+
+
+@pytest.fixture(scope="session")
+def _test_user_id(_connection) -> str:
+    """
+    Create the test user once, in the session's outer transaction.
     
-    with TestClient(app) as test_client:
-        yield test_client
-    
-    app.dependency_overrides.clear()
+    Tests run in savepoints above it, so changes they make to the user are
+    rolled back with the test.
+    """
+    return _connection.execute(
+        insert(User).values(
+            email="test@example.com",
+            password_hash=TEST_PASSWORD_HASH,
+            full_name="Test User",
+            is_active=True,
+            is_verified=True  # Verified for most tests
+        ).returning(User.id)
+    ).scalar_one()
 
 
 @pytest.fixture(scope="function")
-def test_user(db: Session) -> User:
-    """Create a test user."""
-    user = User(
-        email="test@example.com",
-        password_hash=get_password_hash("TestPassword123!"),
-        full_name="Test User",
-        is_active=True,
-        is_verified=True  # Verified for most tests
-    )
-    db.add(user)
-    db.commit()
-    db.refresh(user)
-    return user
+def test_user(db: Session, _test_user_id: str) -> User:
+    """Get the test user in this test's session."""
+    return db.get(User, _test_user_id)
 
 
 @pytest.fixture(scope="function")
 def test_user_with_subscription(db: Session, test_user: User) -> User:
-    """Create a test user with free subscription."""
-    SubscriptionService.create_free_subscription(test_user.id, db)
-    db.refresh(test_user)
+    """
+    Create a test user with free subscription.
+    
+    Built inline rather than via SubscriptionService.create_free_subscription
+    (covered by test_subscriptions.py) to keep the fixture to one INSERT.
+    """
+    now = datetime.utcnow()
+    db.add(Subscription(
+        user_id=test_user.id,
+        plan=SubscriptionPlan.FREE,
+        billing_period=BillingPeriod.MONTHLY,
+        status=SubscriptionStatus.ACTIVE,
+        current_period_start=now,
+        current_period_end=now + timedelta(days=30),
+        cancel_at_period_end=False
+    ))
+    db.commit()
     return test_user
 
 
 @pytest.fixture(scope="function")
-def auth_token(client: TestClient, db: Session, test_user: User) -> str:
-    """Get authentication token for test user."""
-    # Ensure user is verified
-    test_user.is_verified = True
-    db.commit()
-    
-    response = client.post(
-        "/api/v1/auth/login",
-        json={
-            "email": test_user.email,
-            "password": "TestPassword123!"
-        }
-    )
+def auth_token(test_user: User) -> str:
+    """
+    Get authentication token for test user.
     
-    assert response.status_code == 200
-    return response.json()["access_token"]
+    Minted directly; the login endpoint itself is covered by test_auth.py.
+    """
+    return create_access_token(data={"sub": test_user.id})
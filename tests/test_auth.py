@@ -16,7 +16,7 @@ def test_user_registration(client: TestClient, db: Session):
     response = client.post(
         "/api/v1/auth/register",
         json={
-            "email": "test@example.com",
+            "email": "newuser@example.com",
             "password": "TestPassword123!",
             "full_name": "Test User"
         }
@@ -26,7 +26,7 @@ def test_user_registration(client: TestClient, db: Session):
     data = response.json()
     assert "access_token" in data
     assert "user" in data
-    assert data["user"]["email"] == "test@example.com"
+    assert data["user"]["email"] == "newuser@example.com"
     assert data["user"]["is_verified"] is False
 
 
@@ -0,0 +1,233 @@
+"""
+Basic Price Tests
+
+Tests for price creation, lookup, and caching.
+PriceService writes leave committing to the caller, so tests commit explicitly.
+"""
+
+import pytest
+from sqlalchemy.orm import Session
+from models.price import Price, BillingPeriod
+from services.price_service import PriceService
+
+
+def test_create_price(db: Session):
+    """Test creating a new price."""
+    price = PriceService.create_or_update_price(
+        plan="starter",
+        billing_period="monthly",
+        paddle_price_id="pri_starter_monthly",
+        amount=1900,
+        db=db
+    )
+    db.commit()
+    
+    assert price.plan == "starter"
+    assert price.billing_period == BillingPeriod.MONTHLY
+    assert price.amount == 1900
+    assert price.is_active is True
+
+
+def test_get_price_by_plan_and_period(db: Session):
+    """Test looking up the active price for a plan and billing period."""
+    PriceService.create_or_update_price(
+        plan="starter",
+        billing_period="monthly",
+        paddle_price_id="pri_starter_monthly",
+        amount=1900,
+        db=db
+    )
+    db.commit()
+    
+    price = PriceService.get_price_by_plan_and_period("starter", "MONTHLY", db)
+    
+    assert price is not None
+    assert price.paddle_price_id == "pri_starter_monthly"
+    assert PriceService.get_price_by_plan_and_period("starter", "weekly", db) is None
+
+
+def test_new_price_replaces_cached_active_price(db: Session):
+    """Test that creating a price deactivates the old one and refreshes the cache."""
+    PriceService.create_or_update_price(
+        plan="starter",
+        billing_period="monthly",
+        paddle_price_id="pri_old",
+        amount=1900,
+        db=db
+    )
+    db.commit()
+    assert PriceService.get_price_by_plan_and_period("starter", "monthly", db).paddle_price_id == "pri_old"
+    
+    PriceService.create_or_update_price(
+        plan="starter",
+        billing_period="monthly",
+        paddle_price_id="pri_new",
+        amount=2900,
+        db=db
+    )
+    db.commit()
+    
+    price = PriceService.get_price_by_plan_and_period("starter", "monthly", db)
+    assert price.paddle_price_id == "pri_new"
+    assert price.amount == 2900
+    assert [p.paddle_price_id for p in PriceService.get_prices_by_plan("starter", db)] == ["pri_new"]
+    
+    old = db.query(Price).filter(Price.paddle_price_id == "pri_old").first()
+    assert old.is_active is False
+
+
+def test_unknown_paddle_id_is_found_once_created(db: Session):
+    """Test that a cached miss for a Paddle price ID is cleared when the price is created."""
+    assert PriceService.get_price_by_paddle_id("pri_webhook", db) is None
+    
+    PriceService.create_or_update_price(
+        plan="starter",
+        billing_period="monthly",
+        paddle_price_id="pri_webhook",
+        amount=1900,
+        db=db
+    )
+    db.commit()
+    
+    price = PriceService.get_price_by_paddle_id("pri_webhook", db)
+    assert price is not None
+    assert price.plan == "starter"
+
+
+def test_orm_price_update_invalidates_snapshot(db: Session):
+    """Test that editing a Price row directly is picked up by cached lookups."""
+    PriceService.create_or_update_price(
+        plan="starter",
+        billing_period="monthly",
+        paddle_price_id="pri_starter_monthly",
+        amount=1900,
+        db=db
+    )
+    db.commit()
+    assert PriceService.get_price_by_plan_and_period("starter", "monthly", db).amount == 1900
+    
+    price = db.query(Price).filter(Price.paddle_price_id == "pri_starter_monthly").first()
+    price.amount = 2100
+    db.commit()
+    
+    assert PriceService.get_price_by_plan_and_period("starter", "monthly", db).amount == 2100
+
+
+def test_update_existing_price_in_place(db: Session):
+    """Test that re-syncing a Paddle price ID updates the existing row."""
+    created = PriceService.create_or_update_price(
+        plan="starter",
+        billing_period="monthly",
+        paddle_price_id="pri_starter_monthly",
+        amount=1900,
+        db=db
+    )
+    db.commit()
+    
+    updated = PriceService.create_or_update_price(
+        plan="starter",
+        billing_period="monthly",
+        paddle_price_id="pri_starter_monthly",
+        amount=2400,
+        currency="EUR",
+        db=db
+    )
+    db.commit()
+    
+    assert updated.id == created.id
+    assert updated.amount == 2400
+    assert updated.currency == "EUR"
+    assert db.query(Price).count() == 1
+
+
+def test_get_plan_with_prices(db: Session):
+    """Test getting a plan with both billing period prices flattened."""
+    PriceService.create_or_update_price(
+        plan="power",
+        billing_period="monthly",
+        paddle_price_id="pri_power_monthly",
+        amount=4900,
+        db=db
+    )
+    db.commit()
+    PriceService.create_or_update_price(
+        plan="power",
+        billing_period="yearly",
+        paddle_price_id="pri_power_yearly",
+        amount=49000,
+        db=db
+    )
+    db.commit()
+    
+    plan = PriceService.get_plan_with_prices("power", db)
+    
+    assert plan["monthly_amount_cents"] == 4900
+    assert plan["monthly_paddle_price_id"] == "pri_power_monthly"
+    assert plan["yearly_amount_cents"] == 49000
+    assert plan["yearly_paddle_price_id"] == "pri_power_yearly"
+    assert PriceService.get_plan_with_prices("starter", db) is None
+
+
+def test_get_prices_for_plans(db: Session):
+    """Test getting active prices for several plans in one call."""
+    PriceService.create_or_update_prices([
+        {"plan": "starter", "billing_period": "monthly", "paddle_price_id": "pri_s_m", "amount": 900},
+        {"plan": "starter", "billing_period": "yearly", "paddle_price_id": "pri_s_y", "amount": 9000},
+        {"plan": "power", "billing_period": "monthly", "paddle_price_id": "pri_p_m", "amount": 4900},
+    ], db)
+    db.commit()
+    
+    prices = PriceService.get_prices_for_plans(["starter", "power", "professional"], db)
+    
+    assert sorted(p.paddle_price_id for p in prices["starter"]) == ["pri_s_m", "pri_s_y"]
+    assert [p.paddle_price_id for p in prices["power"]] == ["pri_p_m"]
+    assert "professional" not in prices
+
+
+def test_create_or_update_prices_batch(db: Session):
+    """Test batch upsert of prices with sibling deactivation."""
+    PriceService.create_or_update_price(
+        plan="starter",
+        billing_period="monthly",
+        paddle_price_id="pri_old",
+        amount=1900,
+        db=db
+    )
+    db.commit()
+    
+    prices = PriceService.create_or_update_prices([
+        {"plan": "starter", "billing_period": "monthly", "paddle_price_id": "pri_new", "amount": 2900},
+        {"plan": "starter", "billing_period": "yearly", "paddle_price_id": "pri_yearly", "amount": 29000},
+    ], db)
+    db.commit()
+    
+    assert [p.paddle_price_id for p in prices] == ["pri_new", "pri_yearly"]
+    active = sorted(p.paddle_price_id for p in PriceService.get_all_active_prices(db))
+    assert active == ["pri_new", "pri_yearly"]
+
+
+def test_create_or_update_prices_rejects_duplicates(db: Session):
+    """Test that a batch can't contain two prices for the same plan/period."""
+    with pytest.raises(ValueError):
+        PriceService.create_or_update_prices([
+            {"plan": "starter", "billing_period": "monthly", "paddle_price_id": "pri_a", "amount": 1900},
+            {"plan": "starter", "billing_period": "monthly", "paddle_price_id": "pri_b", "amount": 2900},
+        ], db)
+
+
+def test_snapshot_not_installed_when_invalidated_during_rebuild(db: Session, monkeypatch):
+    """Test that a rebuild overlapping a price write doesn't cache its stale result."""
+    from services import price_service
+    
+    execute = db.execute
+    
+    def execute_then_invalidate(*args, **kwargs):
+        result = execute(*args, **kwargs)
+        # A price write commits while the rebuild is still reading
+        PriceService.invalidate_cache()
+        return result
+    
+    monkeypatch.setattr(db, "execute", execute_then_invalidate)
+    PriceService.get_all_active_prices(db)
+    
+    assert price_service._snapshot_loaded_at is None